@@ -0,0 +1,105 @@
+"""Build a synthetic columnar asset register and report its cold-start cost.
+
+Usage:
+    python benchmarks/asset_register.py --rows 1000000 [--path /tmp/asset_register]
+
+The register is written once, then loaded in a fresh interpreter so the
+reported load time and RSS reflect a container cold start.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker_app"))
+
+import numpy as np
+
+ASSET_KINDS = ["Building", "Parking Garage", "HVAC System", "Substation", "Pipeline", "Pump Station",
+               "Transformer", "Wind Turbine", "Data Center", "Warehouse", "Elevator Systems", "Control System"]
+
+
+def rss_mib() -> float:
+    """Current resident set size of this process"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def build(path: str, rows: int, portfolios: int, seed: int = 0):
+    from asset_store import AssetTable
+
+    rng = np.random.default_rng(seed)
+    kinds = rng.integers(0, len(ASSET_KINDS), rows)
+    sites = rng.integers(0, 500, rows)
+    ids = [str(i) for i in range(1, rows + 1)]
+    names = [f"{ASSET_KINDS[k]} {s}" for k, s in zip(kinds.tolist(), sites.tolist())]
+    portfolio_ids = [f"p{p}" for p in rng.integers(1, portfolios + 1, rows).tolist()]
+    values = rng.lognormal(14, 1, rows).astype(np.int64)
+
+    start = time.perf_counter()
+    AssetTable.from_columns(ids, names, portfolio_ids, values).save(path)
+    return time.perf_counter() - start
+
+
+def cold_start(path: str, lookups: int = 1000) -> dict:
+    """Run in a fresh interpreter: load the register and time typical lookups"""
+    baseline = rss_mib()
+    start = time.perf_counter()
+    from asset_store import AssetStore
+    store = AssetStore.load(path)
+    load_seconds = time.perf_counter() - start
+    loaded = rss_mib()
+
+    rng = np.random.default_rng(1)
+    start = time.perf_counter()
+    for i in rng.integers(1, len(store) + 1, lookups).tolist():
+        store.get(str(i))
+    get_us = (time.perf_counter() - start) / lookups * 1e6
+
+    start = time.perf_counter()
+    portfolio = store.portfolio(store.table.portfolios[0])
+    portfolio_ms = (time.perf_counter() - start) * 1e3
+
+    return {
+        "rows": len(store),
+        "loadSeconds": round(load_seconds, 4),
+        "rssBaselineMiB": round(baseline, 1),
+        "rssAfterLoadMiB": round(loaded, 1),
+        "rssAfterLookupsMiB": round(rss_mib(), 1),
+        "getMicroseconds": round(get_us, 2),
+        "portfolioAssets": len(portfolio),
+        "portfolioMilliseconds": round(portfolio_ms, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--portfolios", type=int, default=1000)
+    parser.add_argument("--path", default="")
+    parser.add_argument("--cold-start", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start:
+        print(json.dumps(cold_start(args.path)))
+        return
+
+    path = args.path or tempfile.mkdtemp(prefix="asset_register_")
+    build_seconds = build(path, args.rows, args.portfolios)
+    output = subprocess.run([sys.executable, __file__, "--cold-start", "--path", path],
+                            check=True, capture_output=True, text=True).stdout
+    report = json.loads(output)
+    report["buildSeconds"] = round(build_seconds, 2)
+    report["diskMiB"] = round(sum(e.stat().st_size for e in os.scandir(path)) / 2**20, 1)
+    report["path"] = path
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Check that history compaction keeps exactly the latest optimization result.
+
+Usage:
+    python benchmarks/history_compaction.py
+
+Builds conversations of several questions, each running get_assets and
+optimize_investments, compacts them after every question with a budget
+small enough to drop old questions, and checks that the history holds the
+latest optimize_investments result once: either still in place, or carried
+forward as a "[kept from an earlier question]" block, never both and never
+an older one. Exits with status 1 on any failure.
+"""
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker_app"))
+
+from history_compaction import CARRIED, CompactingConversationManager  # noqa: E402
+
+
+def _tool_turn(tool_use_id: str, name: str, result: dict) -> list:
+    return [
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": tool_use_id, "name": name, "input": {}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": tool_use_id, "status": "success",
+                                                     "content": [{"text": json.dumps(result)}]}}]},
+    ]
+
+
+def question(n: int, optimize: bool) -> list:
+    """One question: an asset listing, optionally an optimization tagged with n, and an answer"""
+    assets = {"success": True, "data": [{"id": str(i), "value": 1000 * i} for i in range(40)], "total": 40}
+    messages = [{"role": "user", "content": [{"text": f"Question {n}"}]}]
+    messages += _tool_turn(f"assets-{n}", "get_assets", assets)
+    if optimize:
+        plan = {"success": True, "data": {"selectedInvestments": [{"assetId": str(n)}], "totalCost": 1000.0 * n,
+                                          "totalRiskReduction": n / 10, "optimalityGap": 0.0}}
+        messages += _tool_turn(f"optimize-{n}", "optimize_investments", plan)
+    messages.append({"role": "assistant", "content": [{"text": f"Answer {n}"}]})
+    return messages
+
+
+def kept_copies(messages: list) -> list:
+    """Optimization numbers found in the history, in place or carried"""
+    found = []
+    for message in messages:
+        for block in message.get("content", []):
+            result = block.get("toolResult")
+            if result and result["toolUseId"].startswith("optimize-"):
+                content = result["content"][0].get("text", "")
+                if not content.startswith("[compacted]"):
+                    found.append(int(result["toolUseId"].split("-")[1]))
+            if block.get("text", "").startswith(CARRIED):
+                found.append(int(json.loads(block["text"].split(": ", 1)[1])["data"]["totalCost"] // 1000))
+    return found
+
+
+def run(pattern: str, budget: int) -> list:
+    """Failures for a conversation whose question n optimizes when pattern[n] == 'o'"""
+    manager = CompactingConversationManager(budget)
+    agent = SimpleNamespace(messages=[])
+    latest, failures = None, []
+    for n, kind in enumerate(pattern, start=1):
+        agent.messages.extend(question(n, kind == "o"))
+        latest = n if kind == "o" else latest
+        manager.apply_management(agent)
+        copies = kept_copies(agent.messages)
+        expected = [] if latest is None else [latest]
+        if copies != expected:
+            failures.append(f"{pattern} budget {budget}, after question {n}: kept {copies}, expected {expected}")
+    return failures
+
+
+def main() -> int:
+    cases = [(pattern, budget) for pattern in ("oooo", "o.o.", "o...", ".o.o", "oo..o") for budget in (60, 150, 400)]
+    failures = [failure for pattern, budget in cases for failure in run(pattern, budget)]
+    for failure in failures:
+        print("FAIL", failure)
+    print(f"{len(failures)} failures in {len(cases)} conversations")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Load test the capital planning agent against the offline scripted model.
+
+Usage:
+    python benchmarks/load_test.py --sessions 1,10,50 [--requests 3] [--first-token-ms 800]
+    python benchmarks/load_test.py --prompts compare --executor sequential,concurrent
+
+Each session gets its own agent (as a Streamlit session does) sharing one
+ScriptedModel, and runs its requests one after another on its own thread,
+like the Streamlit script thread of a browser tab. Real tools run against
+the configured asset register. Reports request latency percentiles,
+throughput and the resident memory added per session, to size how many
+users one task (512 MiB, 0.25 vCPU in cdk_stack.py) can serve.
+
+"--prompts compare" makes several tool calls per model turn (three
+portfolios listed, then simulated); run it under both tool executors to
+measure what concurrent tool execution saves. --tool-latency-ms adds a
+fixed delay to every tool call, standing in for the remote asset and risk
+services the tools would call in production.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker_app"))
+# The report is JSON on stdout; keep the EMF metric lines out of it
+os.environ["METRICS_EMF"] = "0"
+
+import numpy as np
+from strands.handlers.callback_handler import null_callback_handler
+
+from asset_register import rss_mib
+
+PROMPTS = {
+    "default": ["Optimize portfolio p1.", "Perform a risk assessment on portfolio p1.", "What assets are in portfolio p1?"],
+    "compare": ["Compare the simulated risk of portfolios p1, p2 and p3."],
+}
+TASK_MEMORY_MIB = 512
+
+
+def add_tool_latency(milliseconds: float):
+    """Delay every tool call by a fixed time, inside its tool_limits slot"""
+    from tool_limits import tool_limits
+
+    run_limited = tool_limits.run
+
+    def run_delayed(name, func, *args, **kwargs):
+        @functools.wraps(func)
+        def delayed(*a, **kw):
+            time.sleep(milliseconds / 1000)
+            return func(*a, **kw)
+        return run_limited(name, delayed, *args, **kwargs)
+
+    tool_limits.run = run_delayed
+
+
+def run(sessions: int, requests: int, model, budget: float, horizon_months: int, prompts: list,
+        executor: str = "concurrent") -> dict:
+    from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+
+    from agents import create_capital_planning_agent
+
+    baseline = rss_mib()
+    agents = []
+    for i in range(sessions):
+        agent = create_capital_planning_agent(model, budget, horizon_months, "User 1", f"load-{sessions}-{i}")
+        # The default handler prints every event to stdout
+        agent.callback_handler = null_callback_handler
+        agent.tool_executor = SequentialToolExecutor() if executor == "sequential" else ConcurrentToolExecutor()
+        agents.append(agent)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def session(agent, index):
+        for r in range(requests):
+            prompt = prompts[(index + r) % len(prompts)]
+            start = time.perf_counter()
+            try:
+                agent(prompt)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for future in [pool.submit(session, agent, i) for i, agent in enumerate(agents)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    peak = rss_mib()
+
+    latencies_ms = np.array(latencies) * 1000
+    per_session = (peak - baseline) / sessions
+    return {
+        "executor": executor,
+        "sessions": sessions,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "p50Ms": round(float(np.percentile(latencies_ms, 50)), 1) if len(latencies_ms) else None,
+        "p95Ms": round(float(np.percentile(latencies_ms, 95)), 1) if len(latencies_ms) else None,
+        "p99Ms": round(float(np.percentile(latencies_ms, 99)), 1) if len(latencies_ms) else None,
+        "throughputRps": round(len(latencies) / elapsed, 2),
+        "rssBaselineMiB": round(baseline, 1),
+        "rssPeakMiB": round(peak, 1),
+        "rssPerSessionMiB": round(per_session, 3),
+        "firstErrors": errors[:3],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,10,50", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=3, help="requests per session")
+    parser.add_argument("--prompts", default="default", choices=sorted(PROMPTS))
+    parser.add_argument("--executor", default="concurrent", help="comma-separated tool executors: concurrent, sequential")
+    parser.add_argument("--tool-latency-ms", type=float, default=0, help="simulated service latency per tool call")
+    parser.add_argument("--first-token-ms", type=float, default=800)
+    parser.add_argument("--tokens-per-second", type=float, default=60)
+    parser.add_argument("--budget", type=float, default=2_000_000)
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--cpus", type=int, default=0, help="pin to this many CPUs (0 = no pinning)")
+    parser.add_argument("--output", default="", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    if args.cpus:
+        os.sched_setaffinity(0, set(range(args.cpus)))
+    from scripted_model import ScriptedModel, capital_planning_scripts
+
+    if args.tool_latency_ms:
+        add_tool_latency(args.tool_latency_ms)
+
+    model = ScriptedModel(capital_planning_scripts(budget=args.budget, horizon_months=args.horizon),
+                          first_token_ms=args.first_token_ms, tokens_per_second=args.tokens_per_second, seed=0)
+    results = [run(int(n), args.requests, model, args.budget, args.horizon, PROMPTS[args.prompts], executor)
+               for executor in args.executor.split(",") for n in args.sessions.split(",")]
+
+    largest = max(results, key=lambda r: r["sessions"])
+    headroom = TASK_MEMORY_MIB - largest["rssBaselineMiB"]
+    report = {
+        "prompts": args.prompts,
+        "firstTokenMs": args.first_token_ms,
+        "toolLatencyMs": args.tool_latency_ms,
+        "tokensPerSecond": args.tokens_per_second,
+        "cpus": args.cpus or os.cpu_count(),
+        "results": results,
+        "sessionsFittingTaskMemory": int(headroom / largest["rssPerSessionMiB"]) if largest["rssPerSessionMiB"] > 0 else None,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Benchmark the core of get_assets, analyze_risk and optimize_investments as the register grows.
+
+Usage:
+    python benchmarks/scale.py [--sizes 100,1000,10000,100000,1000000] [--output benchmarks/results.json]
+
+Synthetic portfolios get every INTERVENTION_TYPES candidate per asset. The
+functions behind each tool are timed directly (no @tool wrapper, no
+permission or memo layer); peak memory is measured separately with
+tracemalloc so it does not distort the timings. Optimization quality is
+compared with an exact dynamic program where that is tractable
+(--exact-max assets) and with the LP relaxation bound everywhere. The JSON
+output records the git commit, so runs can be diffed between commits.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker_app"))
+
+import numpy as np
+
+# Asset values are multiples of this, so intervention costs share a unit and
+# the exact optimum is an integer dynamic program
+VALUE_UNIT = 50_000
+BUDGET_SHARE = 0.2
+HORIZON_MONTHS = 12
+
+
+def synthetic_store(assets: int, seed: int = 0):
+    from asset_store import AssetStore, AssetTable
+
+    rng = np.random.default_rng(seed)
+    portfolios = max(10, assets // 100)
+    values = np.maximum(1, np.round(rng.lognormal(14, 1, assets) / VALUE_UNIT)).astype(np.int64) * VALUE_UNIT
+    table = AssetTable.from_columns(
+        [f"A{i:07d}" for i in range(assets)],
+        [f"Asset {i % 997}" for i in range(assets)],
+        [f"p{p}" for p in rng.integers(1, portfolios + 1, assets).tolist()],
+        values,
+    )
+    return AssetStore(table)
+
+
+def exact_optimum(group: np.ndarray, cost: np.ndarray, value: np.ndarray, budget: float) -> float:
+    """Reference multiple-choice knapsack optimum by DP over the exact integer cost grid"""
+    units = np.round(cost).astype(np.int64)
+    unit = int(np.gcd.reduce(units[units > 0])) if (units > 0).any() else 1
+    cells = int(budget // unit)
+    best = np.zeros(cells + 1)
+    order = np.argsort(group, kind="stable")
+    bounds = np.flatnonzero(np.diff(group[order])) + 1
+    for items in np.split(order, bounds):
+        candidate = best.copy()
+        for item in items:
+            w = units[item] // unit
+            if w > cells:
+                continue
+            shifted = np.full(cells + 1, -np.inf)
+            shifted[w:] = best[:cells + 1 - w] + value[item]
+            np.maximum(candidate, shifted, out=candidate)
+        best = candidate
+    return float(best[-1])
+
+
+def measure(func, repeat: int):
+    """Best wall time over `repeat` runs, then peak traced memory of one more run"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {"seconds": round(min(times), 6), "peakMiB": round(peak / 2**20, 3)}
+
+
+def bench_size(assets: int, args) -> dict:
+    from authorization import PolicyEngine
+    from optimizer import solve_mckp
+    from risk_engine import score_risk, simulate_risk
+    from tools.investment_tool import CandidateSet
+
+    store = synthetic_store(assets)
+    policy = PolicyEngine(store.table.portfolios, {"bench": ["FULL_ASSETS_SERVICE"]}).for_user("bench")
+    repeat = args.repeat if assets <= 100_000 else 1
+    report = {"assets": assets, "portfolios": len(store.table.portfolios)}
+
+    # get_assets: a page of rows, one portfolio, and the aggregate summary
+    _, report["getAssetsPage"] = measure(
+        lambda: [store.table.asset(r) for r in store.page(policy, None, 0, 100)[0]], repeat)
+    _, report["getAssetsPortfolio"] = measure(lambda: store.portfolio(store.table.portfolios[0]), repeat)
+    _, report["getAssetsAggregate"] = measure(lambda: store.summarize(policy.visible_codes(), 3), repeat)
+
+    # analyze_risk: deterministic scores for every asset, and a fixed-size simulation
+    ids = [i.decode() for i in store.table.ids.tolist()]
+    values = np.asarray(store.table.values)
+    risk, report["analyzeRisk"] = measure(lambda: score_risk(values, ids, HORIZON_MONTHS), repeat)
+    if assets <= args.simulate_max:
+        _, timing = measure(lambda: simulate_risk(values, ids, HORIZON_MONTHS, args.samples, None), 1)
+        report["simulateRisk"] = {**timing, "samples": args.samples}
+
+    # optimize_investments: candidate generation and the knapsack solve
+    budget = float(values.sum()) * BUDGET_SHARE
+    candidates, report["generateCandidates"] = measure(lambda: CandidateSet.from_assets(ids, values), repeat)
+    item_values = risk[candidates.groups] * candidates.risk_reductions
+    solution, timing = measure(
+        lambda: solve_mckp(candidates.groups, candidates.costs, item_values, budget), repeat)
+    quality = {
+        "budget": budget,
+        "totalCost": solution.total_cost,
+        "totalRiskReduction": round(solution.total_value, 6),
+        "upperBound": round(solution.upper_bound, 6),
+        "gapToBound": round(solution.gap, 8),
+        "exact": solution.exact,
+    }
+    if assets <= args.exact_max:
+        start = time.perf_counter()
+        optimum = exact_optimum(candidates.groups, candidates.costs, item_values, budget)
+        quality["exactOptimum"] = round(optimum, 6)
+        quality["qualityRatio"] = round(solution.total_value / optimum, 8) if optimum else 1.0
+        quality["exactSeconds"] = round(time.perf_counter() - start, 3)
+    report["optimizeInvestments"] = {**timing, **quality}
+    return report
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per function (1 above 100k assets)")
+    parser.add_argument("--exact-max", type=int, default=1000, help="largest size compared with the exact optimum")
+    parser.add_argument("--simulate-max", type=int, default=100_000, help="largest size simulated")
+    parser.add_argument("--samples", type=int, default=200, help="Monte Carlo samples per asset")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.json"))
+    args = parser.parse_args()
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        results.append(bench_size(size, args))
+        print(json.dumps(results[-1]), flush=True)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
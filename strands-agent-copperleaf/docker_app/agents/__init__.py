@@ -1,3 +1,3 @@
-from .capital_planning_agent import create_capital_planning_agent
+from .capital_planning_agent import create_capital_planning_agent, update_planning_context
 
-__all__ = ["create_capital_planning_agent"]
\ No newline at end of file
+__all__ = ["create_capital_planning_agent", "update_planning_context"]
\ No newline at end of file
@@ -1,19 +1,40 @@
 from strands import Agent
 from strands.models import BedrockModel
-from tools import get_assets, analyze_risk, optimize_investments
+from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+from config_file import Config
+from history_compaction import CompactingConversationManager
+from tools import get_assets, analyze_risk, optimize_investments, investment_frontier
+from instrumentation import Instrumentation
 
-def create_capital_planning_agent(model: BedrockModel, budget: float, horizon_months: int, user: str = "User 1") -> Agent:
-    system_prompt = f"""You are a capital planning assistant with access to portfolio management tools.
+def planning_prompt(budget: float, horizon_months: int, user: str = "User 1") -> str:
+    return f"""You are a capital planning assistant with access to portfolio management tools.
 Help users analyze assets, assess risks, and optimize investment decisions.
 The available budget is ${budget:,.0f} and the time horizon is {horizon_months} months.
 The current user is {user}.
 Use these values when calling the investment optimization and risk analysis tools.
 Always pass the user parameter as "{user}" when calling get_assets.
+For overviews or totals, call get_assets with aggregate=True instead of listing every asset; follow nextCursor only when the listing itself is needed.
+To optimize, call optimize_investments with just the portfolio_id (or asset_ids); candidates are generated server-side.
+For what-if questions over several budgets, call investment_frontier once and answer from its curve.
+Independent calls, such as get_assets or analyze_risk for several portfolios, can be made together in one turn; call optimize_investments only after the analyze_risk results it depends on have returned.
 Only reply to the specific questions asked by the user. Do not ask follow up questions"""
-    
+
+
+def create_capital_planning_agent(model: BedrockModel, budget: float, horizon_months: int, user: str = "User 1", session_id: str = "default") -> Agent:
     return Agent(
         name="Capital Planning Agent",
         model=model,
-        system_prompt=system_prompt,
-        tools=[get_assets, analyze_risk, optimize_investments]
-    )
\ No newline at end of file
+        system_prompt=planning_prompt(budget, horizon_months, user),
+        tools=[get_assets, analyze_risk, optimize_investments, investment_frontier],
+        # Tools scope stored risk scores to this session
+        state={"session_id": session_id},
+        hooks=[Instrumentation()],
+        # Consumed tool results are summarized so history stays within budget
+        conversation_manager=CompactingConversationManager(Config.HISTORY_TOKEN_BUDGET),
+        # Independent tool calls of a model turn run in parallel (bounded by tool_limits)
+        tool_executor=SequentialToolExecutor() if Config.TOOL_EXECUTOR == "sequential" else ConcurrentToolExecutor()
+    )
+
+def update_planning_context(agent: Agent, budget: float, horizon_months: int, user: str = "User 1"):
+    """Point an existing agent at a new budget or horizon, keeping its conversation"""
+    agent.system_prompt = planning_prompt(budget, horizon_months, user)
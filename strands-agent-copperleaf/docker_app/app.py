@@ -1,18 +1,90 @@
+import asyncio
+import logging
+import time
+import uuid
 import streamlit as st
 from strands.models import BedrockModel
-from agents import create_capital_planning_agent
+from agents import create_capital_planning_agent, update_planning_context
+from tools.investment_tool import preview_budget
+from chat_stream import GUARDRAIL_NOTICE, StreamStats, chat_updates
+from fast_path import remember, router
+from tool_memo import tool_memo
+from config_file import Config
+from scripted_model import ScriptedModel
+from bedrock_client import bedrock_model
+
+# In production, retrieve guardrail ID from parameter storage
+GUARDRAIL_CONFIG = ("e9c8r9thmvgn", "1", "enabled")
+
+# ============================================================================
+# CACHED RESOURCES
+# ============================================================================
+# Models survive reruns, so a rerun (every widget change or keystroke) no
+# longer builds a Bedrock client. Agents hold a conversation, so they are kept
+# per session in st.session_state (see AGENT INITIALIZATION).
+@st.cache_resource(max_entries=8)
+def get_model(model_id: str, guardrail_config: tuple) -> BedrockModel:
+    guardrail_id, guardrail_version, guardrail_trace = guardrail_config
+    # Bedrock models share one pooled bedrock-runtime client
+    build_model = ScriptedModel if Config.MODEL_PROVIDER == "scripted" else bedrock_model
+    return build_model(model_id=model_id,
+                       max_tokens=4096,
+                       guardrail_id=guardrail_id,
+                       guardrail_version=guardrail_version,
+                       guardrail_trace=guardrail_trace)
+
+
+# One agent (and conversation) per model and user in this session, living as
+# long as the session. Budget and horizon are left out of the key: changing
+# them updates the system prompt in place instead of discarding the conversation.
+def get_agent(model_id: str, guardrail_config: tuple, user: str, budget: float, horizon_months: int):
+    key = (model_id, user)
+    if key not in st.session_state.agents:
+        st.session_state.agents[key] = create_capital_planning_agent(
+            get_model(model_id, guardrail_config), budget, horizon_months, user, st.session_state.session_id)
+    return st.session_state.agents[key]
+
+
+async def stream_reply(agent, prompt: str):
+    """Render text deltas, tool progress and guardrail notices as they arrive"""
+    stats = StreamStats()
+    progress = st.empty()
+    progress.caption("Thinking…")
+    body = st.empty()
+    text, notes, warned = "", [], False
+    async for kind, payload in chat_updates(agent, prompt, stats):
+        if kind == "text":
+            text += payload
+            body.text(text)
+        elif kind == "tool":
+            # Text before a tool call is the model's preamble; keep it apart from the answer
+            text = text + "\n\n" if text else text
+            notes.append(payload)
+            progress.caption("  \n".join(notes))
+        elif kind == "tool_result":
+            notes.append(payload)
+            progress.caption("  \n".join(notes))
+        elif kind == "guardrail":
+            if payload is not None:
+                text = payload
+                body.text(text)
+            if not warned:
+                st.warning(GUARDRAIL_NOTICE)
+                warned = True
+    if not notes:
+        progress.empty()
+    return text.strip(), notes, stats
+
 
 # ============================================================================
 # SESSION STATE INITIALIZATION
 # ============================================================================
 if "messages" not in st.session_state:
     st.session_state.messages = []
-if "last_budget" not in st.session_state:
-    st.session_state.last_budget = None
-if "last_horizon" not in st.session_state:
-    st.session_state.last_horizon = None
-if "last_user" not in st.session_state:
-    st.session_state.last_user = None
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "agents" not in st.session_state:
+    st.session_state.agents = {}
 
 # ============================================================================
 # PAGE HEADER
@@ -53,36 +125,42 @@ with st.sidebar:
         format="%d"
     )
 
+    # Budget what-ifs are answered from the last computed frontier, without the LLM
+    preview = preview_budget(st.session_state.session_id, budget)
+    if preview:
+        st.caption(f"Last frontier: ${preview['totalCost']:,.0f} buys {len(preview['selectedInvestments'])} interventions, "
+                   f"risk reduction {preview['totalRiskReduction']:.3f}")
+
+    memo_stats = tool_memo.stats(st.session_state.session_id)
+    if memo_stats["hits"] or memo_stats["misses"]:
+        st.caption(f"Tool cache: {memo_stats['hits']} hits, {memo_stats['misses']} misses, "
+                   f"{memo_stats['savedSeconds']:.2f} s saved")
+
+    route_stats = router.stats()
+    if route_stats["hits"]:
+        st.caption(f"Direct answers: {route_stats['hits']} of {route_stats['hits'] + route_stats['misses']} questions, "
+                   f"~{route_stats['savedSeconds']:.1f} s saved")
+
 # ============================================================================
 # AGENT INITIALIZATION
 # ============================================================================
 
-# In production, retrieve guardrail ID from parameter storage
-model = BedrockModel(model_id=selected_model, 
-                     max_tokens=4096,
-                     guardrail_id="e9c8r9thmvgn",
-                     guardrail_version="1",
-                     guardrail_trace="enabled")
-
-# Reinitialize agent if budget, horizon, or user changed
-if (st.session_state.last_budget != budget or 
-    st.session_state.last_horizon != horizon_months or
-    st.session_state.last_user != selected_user):
-    st.session_state.last_budget = budget
-    st.session_state.last_horizon = horizon_months
-    st.session_state.last_user = selected_user
-    agent = create_capital_planning_agent(model, budget, horizon_months, selected_user)
-    st.session_state.agent = agent
-else:
-    agent = st.session_state.get("agent", create_capital_planning_agent(model, budget, horizon_months, selected_user))
-    st.session_state.agent = agent
+setup_start = time.perf_counter()
+agent = get_agent(selected_model, GUARDRAIL_CONFIG, selected_user, budget, horizon_months)
+# Keep the conversation, but make sure the prompt has the current budget and horizon
+update_planning_context(agent, budget, horizon_months, selected_user)
+logging.info("Agent setup took %.2f ms", (time.perf_counter() - setup_start) * 1000)
 
 # ============================================================================
 # DISPLAY CHAT HISTORY
 # ============================================================================
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
+        if message.get("notes"):
+            st.caption("  \n".join(message["notes"]))
         st.text(message["content"])
+        if message.get("ttft_ms") is not None:
+            st.caption(f"First token after {message['ttft_ms'] / 1000:.1f} s")
 
 # ============================================================================
 # CHAT INPUT & RESPONSE
@@ -93,13 +171,23 @@ if user_input := st.chat_input("Ask me anything..."):
     with st.chat_message("user"):
         st.write(user_input)
     
-    # Get agent response
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            agent_response = agent(user_input)
-            response = str(agent_response)
-            st.text(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
+    # Simple lookups are answered directly by the tool; everything else goes to the agent
+    answer = router.answer(user_input, selected_user)
+    if answer is not None:
+        remember(agent, user_input, answer)
+        st.session_state.messages.append({"role": "assistant", "content": answer.text,
+                                          "notes": [f"Answered directly ({answer.intent}) in {answer.elapsed_ms:.0f} ms"]})
+    else:
+        # Stream the agent response
+        with st.chat_message("assistant"):
+            response, notes, stats = asyncio.run(stream_reply(agent, user_input))
+            router.record_agent(stats.total_ms)
+            compaction = agent.conversation_manager.last_report
+            if compaction["saved"] > 0:
+                notes.append(f"History compacted: ~{compaction['saved']:,} tokens saved "
+                             f"(~{compaction['after']:,} tokens sent with the next question)")
+            st.session_state.messages.append({"role": "assistant", "content": response,
+                                              "notes": notes, "ttft_ms": stats.ttft_ms})
     
     st.rerun()
 
@@ -109,4 +197,7 @@ if user_input := st.chat_input("Ask me anything..."):
 if st.session_state.messages:
     if st.button("Clear Chat", use_container_width=True):
         st.session_state.messages = []
+        # A new conversation starts without history or memoized tool results
+        st.session_state.agents = {}
+        tool_memo.clear(st.session_state.session_id)
         st.rerun()
@@ -0,0 +1,239 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from authorization import PolicyEngine, UserPolicy
+
+
+@dataclass
+class Asset:
+    id: str
+    name: str
+    portfolioId: str
+    value: int
+
+
+class AssetTable:
+    """Column-oriented asset register.
+
+    Rows are grouped by portfolio, so a portfolio is a contiguous row range.
+    Portfolio ids and names are interned (each distinct string is stored
+    once and rows hold a code), ids are fixed-width bytes with a sorted
+    index for binary search. Saved registers are memory-mapped on load, so
+    only the pages of rows actually read become resident, and `Asset`
+    objects are only built for rows that are returned.
+    """
+
+    COLUMNS = ["ids", "id_sorted", "id_rows", "portfolio_codes", "portfolio_offsets",
+               "values", "name_codes", "name_offsets", "names_blob"]
+
+    def __init__(self, portfolios: List[str], **columns: np.ndarray):
+        self.portfolios = portfolios
+        self.portfolio_index: Dict[str, int] = {p: i for i, p in enumerate(portfolios)}
+        for column in self.COLUMNS:
+            setattr(self, column, columns[column])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_columns(cls, ids: Sequence[str], names: Sequence[str], portfolio_ids: Sequence[str], values: Sequence[int]) -> "AssetTable":
+        portfolio_ids = np.asarray(portfolio_ids, dtype=str)
+        # Portfolios keep their order of first appearance
+        unique_portfolios, first_row, portfolio_codes = np.unique(portfolio_ids, return_index=True, return_inverse=True)
+        appearance = np.argsort(first_row)
+        portfolio_codes = np.argsort(appearance)[portfolio_codes].astype(np.uint32)
+        rows = np.argsort(portfolio_codes, kind="stable")
+        portfolio_codes = portfolio_codes[rows]
+        portfolio_offsets = np.searchsorted(portfolio_codes, np.arange(len(unique_portfolios) + 1)).astype(np.int64)
+
+        unique_names, name_codes = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        encoded_names = [name.encode("utf-8") for name in unique_names.tolist()]
+        name_offsets = np.concatenate(([0], np.cumsum([len(n) for n in encoded_names], dtype=np.int64)))
+
+        encoded_ids = np.char.encode(np.asarray(ids, dtype=str), "utf-8")[rows]
+        id_rows = np.argsort(encoded_ids, kind="stable").astype(np.int64)
+
+        return cls(
+            [str(p) for p in unique_portfolios[appearance]],
+            ids=encoded_ids,
+            id_sorted=encoded_ids[id_rows],
+            id_rows=id_rows,
+            portfolio_codes=portfolio_codes,
+            portfolio_offsets=portfolio_offsets,
+            values=np.asarray(values, dtype=np.int64)[rows],
+            name_codes=name_codes.astype(np.uint32)[rows],
+            name_offsets=name_offsets,
+            names_blob=np.frombuffer(b"".join(encoded_names), dtype=np.uint8),
+        )
+
+    @classmethod
+    def from_assets(cls, assets: Iterable[Asset]) -> "AssetTable":
+        assets = list(assets)
+        return cls.from_columns(
+            [a.id for a in assets], [a.name for a in assets], [a.portfolioId for a in assets], [a.value for a in assets]
+        )
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        for column in self.COLUMNS:
+            np.save(os.path.join(path, f"{column}.npy"), getattr(self, column))
+        with open(os.path.join(path, "portfolios.json"), "w") as f:
+            json.dump(self.portfolios, f)
+
+    @classmethod
+    def load(cls, path: str) -> "AssetTable":
+        """Memory-map a register written by `save`"""
+        with open(os.path.join(path, "portfolios.json")) as f:
+            portfolios = json.load(f)
+        columns = {c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r") for c in cls.COLUMNS}
+        return cls(portfolios, **columns)
+
+    def find(self, asset_id: str) -> Optional[int]:
+        """Row of an asset id, by binary search over the sorted id index"""
+        key = asset_id.encode("utf-8")
+        if len(key) > self.id_sorted.dtype.itemsize:
+            return None
+        i = int(np.searchsorted(self.id_sorted, key))
+        if i < len(self.id_sorted) and self.id_sorted[i] == key:
+            return int(self.id_rows[i])
+        return None
+
+    def find_many(self, asset_ids: List[str]) -> np.ndarray:
+        """Rows of many asset ids at once (-1 where not found)"""
+        if not asset_ids or not len(self.id_sorted):
+            return np.full(len(asset_ids), -1, dtype=np.int64)
+        keys = np.char.encode(np.asarray(asset_ids, dtype=str), "utf-8")
+        fits = np.char.str_len(keys) <= self.id_sorted.dtype.itemsize
+        keys = keys.astype(self.id_sorted.dtype)
+        i = np.minimum(np.searchsorted(self.id_sorted, keys), len(self.id_sorted) - 1)
+        found = fits & (self.id_sorted[i] == keys)
+        return np.where(found, self.id_rows[i], -1)
+
+    def portfolio_rows(self, portfolio_id: str) -> range:
+        code = self.portfolio_index.get(portfolio_id)
+        if code is None:
+            return range(0)
+        return range(int(self.portfolio_offsets[code]), int(self.portfolio_offsets[code + 1]))
+
+    def name(self, row: int) -> str:
+        code = self.name_codes[row]
+        return bytes(self.names_blob[self.name_offsets[code]:self.name_offsets[code + 1]]).decode("utf-8")
+
+    def asset(self, row: int) -> Asset:
+        """Build the `Asset` view of a single row"""
+        return Asset(
+            id=self.ids[row].decode("utf-8"),
+            name=self.name(row),
+            portfolioId=self.portfolios[self.portfolio_codes[row]],
+            value=int(self.values[row]),
+        )
+
+
+class AssetStore:
+    """Asset register indexed by asset id and portfolio id.
+
+    Permissions are compiled once per user against the register's portfolios
+    (see `authorization.PolicyEngine`), so a lookup costs O(assets returned)
+    instead of a scan of the register.
+    """
+
+    def __init__(self, table: AssetTable):
+        self.table = table
+        self.policies = PolicyEngine(table.portfolios)
+        # Bumped by `invalidate` when the register changes under the store
+        self.version = 0
+        self._portfolio_totals = None
+
+    @classmethod
+    def from_assets(cls, assets: Iterable[Asset]) -> "AssetStore":
+        return cls(AssetTable.from_assets(assets))
+
+    @classmethod
+    def load(cls, path: str) -> "AssetStore":
+        return cls(AssetTable.load(path))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def invalidate(self):
+        self.version += 1
+        self._portfolio_totals = None
+
+    def policy_for(self, user: str) -> UserPolicy:
+        return self.policies.for_user(user)
+
+    def visible_mask(self, policy: UserPolicy, rows: np.ndarray) -> np.ndarray:
+        """Which of the given rows belong to a portfolio visible with the policy"""
+        return policy.filter_codes(self.table.portfolio_codes[rows]) if len(rows) else np.zeros(0, dtype=bool)
+
+    def get(self, asset_id: str) -> Optional[Asset]:
+        row = self.table.find(asset_id)
+        return None if row is None else self.table.asset(row)
+
+    def portfolio(self, portfolio_id: str) -> List[Asset]:
+        return [self.table.asset(row) for row in self.table.portfolio_rows(portfolio_id)]
+
+    def visible_codes(self, policy: UserPolicy, portfolio_id: Optional[str] = None) -> np.ndarray:
+        """Codes of the portfolios visible with the policy (or just the requested one)"""
+        if not portfolio_id:
+            return policy.visible_codes()
+        code = self.table.portfolio_index.get(portfolio_id)
+        if code is None or not policy.can_view(portfolio_id):
+            return np.zeros(0, dtype=np.int64)
+        return np.array([code], dtype=np.int64)
+
+    def page(self, policy: UserPolicy, portfolio_id: Optional[str], start: int, limit: int) -> Tuple[np.ndarray, int]:
+        """Rows start..start+limit of the visible assets, in register order, and the total visible"""
+        codes = self.visible_codes(policy, portfolio_id)
+        starts = self.table.portfolio_offsets[codes]
+        ends = self.table.portfolio_offsets[codes + 1]
+        before = np.concatenate(([0], np.cumsum(ends - starts)))
+        total = int(before[-1])
+        stop = min(start + limit, total)
+        if start >= stop:
+            return np.zeros(0, dtype=np.int64), total
+        # Only the portfolios overlapping the page are expanded into rows
+        first = int(np.searchsorted(before, start, side="right")) - 1
+        last = int(np.searchsorted(before, stop, side="left"))
+        rows = [np.arange(starts[k] + max(0, start - before[k]), starts[k] + min(ends[k] - starts[k], stop - before[k]))
+                for k in range(first, last)]
+        return np.concatenate(rows).astype(np.int64), total
+
+    def portfolio_totals(self) -> np.ndarray:
+        """Total asset value of every portfolio, computed once per store"""
+        if self._portfolio_totals is None:
+            offsets = self.table.portfolio_offsets
+            totals = np.zeros(len(self.table.portfolios), dtype=np.int64)
+            nonempty = offsets[:-1] < offsets[1:]
+            if nonempty.any():
+                totals[nonempty] = np.add.reduceat(np.asarray(self.table.values), offsets[:-1][nonempty])
+            self._portfolio_totals = totals
+        return self._portfolio_totals
+
+    def summarize(self, codes: np.ndarray, top_n: int) -> List[Dict]:
+        """Count, total value and the top_n rows by value of each portfolio"""
+        totals = self.portfolio_totals()
+        top_n = max(top_n, 0)
+        summaries = []
+        for code in codes:
+            start, end = int(self.table.portfolio_offsets[code]), int(self.table.portfolio_offsets[code + 1])
+            values = np.asarray(self.table.values[start:end])
+            top = np.arange(len(values)) if top_n >= len(values) else np.argpartition(-values, max(top_n - 1, 0))[:top_n]
+            top = top[np.lexsort((top, -values[top]))]
+            summaries.append({
+                "portfolioId": self.table.portfolios[code],
+                "count": end - start,
+                "totalValue": int(totals[code]),
+                "topRows": (start + top).tolist(),
+            })
+        return summaries
+
+    def query(self, policy: UserPolicy, portfolio_id: Optional[str] = None) -> List[Asset]:
+        """Assets visible with the given policy, optionally limited to one portfolio"""
+        if portfolio_id:
+            return self.portfolio(portfolio_id) if policy.can_view(portfolio_id) else []
+        return [asset for code in policy.visible_codes() for asset in self.portfolio(self.table.portfolios[code])]
@@ -1,4 +1,97 @@
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Tuple
+
+import numpy as np
+
 user_permissions = {
     "User 1": ["FULL_ASSETS_SERVICE", "FULL_RISK_SERVICE", "FULL_OPTIMIZATION_SERVICE"],
     "User 2": ["RESTRICTED_ASSETS_SERVICE", "FULL_RISK_SERVICE"]
-}
\ No newline at end of file
+}
+
+
+def _even_portfolio(portfolio_id: str) -> bool:
+    """Restricted users only see even-numbered portfolios (p2, p4, ...)"""
+    number = portfolio_id[1:]
+    return not number.isdigit() or int(number) % 2 == 0
+
+
+# Portfolio visibility rule of each asset service permission
+portfolio_visibility = {
+    "FULL_ASSETS_SERVICE": lambda portfolio_id: True,
+    "RESTRICTED_ASSETS_SERVICE": _even_portfolio,
+}
+
+
+@dataclass(frozen=True)
+class UserPolicy:
+    """A user's permissions compiled against the portfolios of the register.
+
+    `visible` holds one flag per portfolio code, so filtering a batch of rows
+    is a single array lookup whatever the number of users or portfolios.
+    """
+    services: FrozenSet[str]
+    asset_permissions: Tuple[str, ...]
+    visible: np.ndarray
+    portfolio_index: Dict[str, int]
+
+    @property
+    def asset_access(self) -> bool:
+        return bool(self.asset_permissions)
+
+    def allows(self, permission: str) -> bool:
+        return permission in self.services
+
+    def can_view(self, portfolio_id: str) -> bool:
+        """Whether every asset permission held allows the portfolio (the most restrictive wins)"""
+        code = self.portfolio_index.get(portfolio_id)
+        if code is not None:
+            return bool(self.visible[code])
+        # Portfolio not in the register: evaluate the rules directly
+        return self.asset_access and all(portfolio_visibility[p](portfolio_id) for p in self.asset_permissions)
+
+    def filter_codes(self, portfolio_codes: np.ndarray) -> np.ndarray:
+        """Mask of the portfolio codes (e.g. of a batch of rows) visible to the user"""
+        return self.visible[portfolio_codes]
+
+    def visible_codes(self) -> np.ndarray:
+        return np.flatnonzero(self.visible)
+
+
+class PolicyEngine:
+    """Compiles permissions into `UserPolicy` objects once per user.
+
+    Each visibility rule is evaluated once per portfolio, and users holding
+    the same asset permissions share one compiled mask.
+    """
+
+    def __init__(self, portfolios: List[str], permissions: Dict[str, List[str]] = None):
+        self.portfolios = portfolios
+        self.portfolio_index = {p: i for i, p in enumerate(portfolios)}
+        self.permissions = user_permissions if permissions is None else permissions
+        self._rule_masks = {
+            permission: np.fromiter((rule(p) for p in portfolios), dtype=bool, count=len(portfolios))
+            for permission, rule in portfolio_visibility.items()
+        }
+        self._grant_masks: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._users: Dict[str, UserPolicy] = {}
+
+    def compile(self, permissions: List[str]) -> UserPolicy:
+        granted = tuple(sorted(p for p in set(permissions) if p in portfolio_visibility))
+        visible = self._grant_masks.get(granted)
+        if visible is None:
+            visible = np.zeros(len(self.portfolios), dtype=bool)
+            if granted:
+                visible = np.logical_and.reduce([self._rule_masks[p] for p in granted])
+            visible.setflags(write=False)
+            self._grant_masks[granted] = visible
+        return UserPolicy(frozenset(permissions), granted, visible, self.portfolio_index)
+
+    def for_user(self, user: str) -> UserPolicy:
+        policy = self._users.get(user)
+        if policy is None:
+            policy = self._users[user] = self.compile(self.permissions.get(user, []))
+        return policy
+
+    def reload(self):
+        """Drop compiled policies after the permissions change"""
+        self._users = {}
@@ -0,0 +1,93 @@
+# Turns Strands agent stream events into chat updates: text deltas, tool
+# progress, tool result sizes and guardrail interventions, in the order they arrive.
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from token_count import estimate_tokens
+
+GUARDRAIL_NOTICE = "The response was blocked by a guardrail."
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreamStats:
+    """Timings of one streamed request"""
+    started: float = field(default_factory=time.perf_counter)
+    first_token: Optional[float] = None
+    finished: Optional[float] = None
+    tool_calls: List[str] = field(default_factory=list)
+    # (tool name, approximate tokens of its result), in call order
+    tool_result_tokens: List[Tuple[str, int]] = field(default_factory=list)
+    guardrail_interventions: int = 0
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        return None if self.first_token is None else (self.first_token - self.started) * 1000
+
+    @property
+    def total_ms(self) -> Optional[float]:
+        return None if self.finished is None else (self.finished - self.started) * 1000
+
+
+def describe_tool_use(tool_use: Dict[str, Any]) -> str:
+    """Short progress line for a tool call, e.g. "Running analyze_risk on 4 assets…" """
+    args = tool_use.get("input") or {}
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError:
+            args = {}
+    if args.get("asset_ids"):
+        target = f" on {len(args['asset_ids'])} assets"
+    elif args.get("candidates"):
+        target = f" on {len(args['candidates'])} candidates"
+    elif args.get("portfolio_id"):
+        target = f" on portfolio {args['portfolio_id']}"
+    else:
+        target = ""
+    return f"Running {tool_use.get('name', 'tool')}{target}…"
+
+
+async def chat_updates(agent, prompt: str, stats: StreamStats) -> AsyncIterator[Tuple[str, Any]]:
+    """Yield ("text", delta), ("tool", description), ("tool_result", size note),
+    ("guardrail", replacement text or None) and finally ("result", AgentResult) while the agent runs"""
+    tool_names: Dict[str, str] = {}
+    async for event in agent.stream_async(prompt):
+        if event.get("data") and not event.get("reasoning"):
+            if stats.first_token is None:
+                stats.first_token = time.perf_counter()
+            yield "text", event["data"]
+        elif "event" in event:
+            chunk = event["event"]
+            if "redactContent" in chunk:
+                replacement = chunk["redactContent"].get("redactAssistantContentMessage")
+                if replacement is not None:
+                    yield "guardrail", replacement
+            elif chunk.get("messageStop", {}).get("stopReason") == "guardrail_intervened":
+                stats.guardrail_interventions += 1
+                yield "guardrail", None
+        elif "message" in event and event["message"].get("role") == "assistant":
+            # The model turn is complete: its tool calls run next
+            for block in event["message"].get("content", []):
+                if "toolUse" in block:
+                    stats.tool_calls.append(block["toolUse"].get("name", ""))
+                    tool_names[block["toolUse"].get("toolUseId")] = block["toolUse"].get("name", "tool")
+                    yield "tool", describe_tool_use(block["toolUse"])
+        elif "message" in event:
+            # Tool results, as they are sent back to the model
+            for block in event["message"].get("content", []):
+                if "toolResult" in block:
+                    name = tool_names.get(block["toolResult"].get("toolUseId"), "tool")
+                    tokens = sum(estimate_tokens(c.get("text", c.get("json"))) for c in block["toolResult"].get("content", []))
+                    stats.tool_result_tokens.append((name, tokens))
+                    yield "tool_result", f"{name} returned ~{tokens:,} tokens"
+        elif "result" in event:
+            stats.finished = time.perf_counter()
+            logger.info("Chat request: ttft=%s ms total=%.0f ms tools=%s tool result tokens=%s guardrail=%d",
+                        "n/a" if stats.ttft_ms is None else f"{stats.ttft_ms:.0f}",
+                        stats.total_ms, stats.tool_calls, stats.tool_result_tokens, stats.guardrail_interventions)
+            yield "result", event["result"]
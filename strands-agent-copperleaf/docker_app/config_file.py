@@ -1,3 +1,5 @@
+import os
+
 class Config:
     # Stack name
     # Change this value if you want to create a new instance of the stack
@@ -18,3 +20,34 @@ class Config:
 
     # Enable authentication
     ENABLE_AUTH = False
+
+    # Directory of a columnar asset register (see asset_store.AssetTable.save).
+    # When empty, the built-in demo assets are used.
+    ASSET_REGISTER_PATH = os.environ.get("ASSET_REGISTER_PATH", "")
+
+    # Risk score context store: "memory", "sqlite" or "redis".
+    # RISK_CONTEXT_URL is the SQLite file path or a redis://host:port/db URL.
+    RISK_CONTEXT_BACKEND = os.environ.get("RISK_CONTEXT_BACKEND", "memory")
+    RISK_CONTEXT_URL = os.environ.get("RISK_CONTEXT_URL", "")
+    RISK_CONTEXT_TTL_SECONDS = int(os.environ.get("RISK_CONTEXT_TTL_SECONDS", 3600))
+    RISK_CONTEXT_MAX_BYTES = int(os.environ.get("RISK_CONTEXT_MAX_BYTES", 32 * 1024 * 1024))
+
+    # Per-conversation memoization of tool results
+    TOOL_MEMO_MAX_ENTRIES = int(os.environ.get("TOOL_MEMO_MAX_ENTRIES", 1024))
+    TOOL_MEMO_TTL_SECONDS = int(os.environ.get("TOOL_MEMO_TTL_SECONDS", 900))
+
+    # Approximate tokens of conversation history sent with each question;
+    # consumed tool results are summarized, then the oldest questions dropped
+    HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", 8000))
+
+    # "bedrock", or "scripted" to run offline against scripted_model.ScriptedModel
+    MODEL_PROVIDER = os.environ.get("MODEL_PROVIDER", "bedrock")
+
+    # Tool calls of one model turn: "concurrent" or "sequential"
+    TOOL_EXECUTOR = os.environ.get("TOOL_EXECUTOR", "concurrent")
+    # Shared tool thread pool, per-tool concurrency limits ("tool=n,...") and
+    # timeouts in seconds (TOOL_TIMEOUT_SECONDS, overridden per tool by TOOL_TIMEOUTS)
+    TOOL_POOL_WORKERS = int(os.environ.get("TOOL_POOL_WORKERS", 8))
+    TOOL_CONCURRENCY = os.environ.get("TOOL_CONCURRENCY", "analyze_risk=4,optimize_investments=2,investment_frontier=2")
+    TOOL_TIMEOUT_SECONDS = float(os.environ.get("TOOL_TIMEOUT_SECONDS", 30))
+    TOOL_TIMEOUTS = os.environ.get("TOOL_TIMEOUTS", "investment_frontier=60")
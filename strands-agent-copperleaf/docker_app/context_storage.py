@@ -1,10 +1,338 @@
-# Simple in-memory context storage for risk scores
-risk_context = {}
+# Risk score context shared between the risk and optimization tools.
+# Scores are scoped by (session, horizon) so concurrent Streamlit sessions
+# never see each other's scores, and entries are evicted by LRU, TTL and a
+# memory cap. The backend is pluggable: in-process, a SQLite file, or any
+# Redis-protocol server (shared by every task behind the load balancer).
+import itertools
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
-def save_risk_scores(asset_risks: dict):
-    """Save risk scores to context"""
-    risk_context.update(asset_risks)
+from config_file import Config
 
-def get_risk_score(asset_id: str) -> float:
+DEFAULT_SESSION = "default"
+DEFAULT_RISK = 0.5
+# Rough in-process cost of one cached score (key tuple, strings, float, expiry)
+ENTRY_BYTES = 256
+
+
+class SessionValues:
+    """One value per session, dropped after ttl_seconds without use"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        # session id -> (value, last used), least recently used first
+        self._values: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self._values and next(iter(self._values.values()))[1] < now - self.ttl_seconds:
+            self._values.popitem(last=False)
+
+    def get(self, session_id: str, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._values.get(session_id)
+            if entry is None:
+                return default
+            self._values[session_id] = (entry[0], now)
+            self._values.move_to_end(session_id)
+            return entry[0]
+
+    def set(self, session_id: str, value: Any):
+        now = time.monotonic()
+        with self._lock:
+            self._values[session_id] = (value, now)
+            self._values.move_to_end(session_id)
+            self._evict(now)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._values)
+
+
+class InMemoryBackend:
+    """Process-local LRU with TTL and a memory cap"""
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_bytes // ENTRY_BYTES)
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put_many(self, session_id: str, horizon_months: int, scores: Dict[str, float]):
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for asset_id, score in scores.items():
+                key = (session_id, horizon_months, asset_id)
+                self._entries[key] = (score, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, session_id: str, horizon_months: int, asset_ids: List[str]) -> Dict[str, float]:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for asset_id in asset_ids:
+                key = (session_id, horizon_months, asset_id)
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[1] < now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[asset_id] = entry[0]
+        return found
+
+    def clear(self, session_id: str):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == session_id]:
+                del self._entries[key]
+
+
+class SQLiteBackend:
+    """SQLite file, shared by the processes of a task (or a mounted volume)"""
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_bytes // ENTRY_BYTES)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS risk_context ("
+            "session_id TEXT, horizon INTEGER, asset_id TEXT, score REAL, expires REAL, used REAL, "
+            "PRIMARY KEY (session_id, horizon, asset_id))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS risk_context_used ON risk_context (used)")
+
+    def put_many(self, session_id: str, horizon_months: int, scores: Dict[str, float]):
+        now = time.time()
+        rows = [(session_id, horizon_months, a, s, now + self.ttl_seconds, now) for a, s in scores.items()]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO risk_context VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.execute("DELETE FROM risk_context WHERE expires < ?", (now,))
+            self._db.execute(
+                "DELETE FROM risk_context WHERE rowid IN (SELECT rowid FROM risk_context ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.execute("COMMIT")
+
+    def get_many(self, session_id: str, horizon_months: int, asset_ids: List[str]) -> Dict[str, float]:
+        found = {}
+        now = time.time()
+        with self._lock:
+            # Stay below SQLite's bound parameter limit
+            for i in range(0, len(asset_ids), 500):
+                chunk = asset_ids[i:i + 500]
+                where = f"session_id = ? AND horizon = ? AND asset_id IN ({','.join('?' * len(chunk))})"
+                found.update(self._db.execute(
+                    f"SELECT asset_id, score FROM risk_context WHERE {where} AND expires >= ?",
+                    (session_id, horizon_months, *chunk, now),
+                ).fetchall())
+                self._db.execute(f"UPDATE risk_context SET used = ? WHERE {where}", (now, session_id, horizon_months, *chunk))
+        return found
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM risk_context WHERE session_id = ?", (session_id,))
+
+
+class RedisError(RuntimeError):
+    """Error reply from the server"""
+
+
+class RedisBackend:
+    """Minimal Redis-protocol (RESP) client: one hash per (session, horizon) with a TTL.
+
+    Eviction under the memory cap is left to the server (maxmemory-policy
+    allkeys-lru), so any Redis-compatible store, or a local stand-in, works.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float):
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or "localhost", parsed.port or 6379)
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.ttl_seconds = int(ttl_seconds)
+        self._lock = threading.Lock()
+        self._socket = None
+        self._reader = None
+
+    def _connect(self):
+        self._socket = socket.create_connection(self.address, timeout=5)
+        self._reader = self._socket.makefile("rb")
+        if self.db:
+            self._socket.sendall(self._encode(["SELECT", self.db]))
+            reply = self._read()
+            if isinstance(reply, RedisError):
+                self._close()
+                raise reply
+
+    def _close(self):
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._reader = None
+
+    def _encode(self, command: list) -> bytes:
+        parts = [f"*{len(command)}\r\n".encode()]
+        for arg in command:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            # Returned, not raised, so the replies after it are still read
+            return RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)[:-2]
+            return data.decode()
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise RuntimeError(f"Unexpected Redis reply {line!r}")
+
+    def _pipeline(self, commands: List[list]) -> list:
+        """Send all commands in one round trip and read their replies.
+
+        Every reply is read before an error reply is raised, so the connection
+        stays in step; after any other failure the connection is reset.
+        """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._socket is None:
+                        self._connect()
+                    self._socket.sendall(b"".join(self._encode(c) for c in commands))
+                    replies = [self._read() for _ in commands]
+                    break
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt:
+                        raise
+                except Exception:
+                    self._close()
+                    raise
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    @staticmethod
+    def _key(session_id: str, horizon_months: int) -> str:
+        return f"risk:{session_id}:{horizon_months}"
+
+    def put_many(self, session_id: str, horizon_months: int, scores: Dict[str, float]):
+        if not scores:
+            return
+        key = self._key(session_id, horizon_months)
+        fields = [x for asset_id, score in scores.items() for x in (asset_id, repr(float(score)))]
+        self._pipeline([["HSET", key, *fields], ["EXPIRE", key, self.ttl_seconds]])
+
+    def get_many(self, session_id: str, horizon_months: int, asset_ids: List[str]) -> Dict[str, float]:
+        if not asset_ids:
+            return {}
+        key = self._key(session_id, horizon_months)
+        values, _ = self._pipeline([["HMGET", key, *asset_ids], ["EXPIRE", key, self.ttl_seconds]])
+        return {a: float(v) for a, v in zip(asset_ids, values) if v is not None}
+
+    def clear(self, session_id: str):
+        # SCAN in batches instead of KEYS, which blocks the server while it walks every key
+        cursor, keys = "0", []
+        while True:
+            cursor, batch = self._pipeline([["SCAN", cursor, "MATCH", f"risk:{session_id}:*", "COUNT", 500]])[0]
+            keys.extend(batch)
+            if cursor == "0":
+                break
+        for i in range(0, len(keys), 500):
+            self._pipeline([["DEL", *keys[i:i + 500]]])
+
+
+def create_backend(kind: str, url: str = "", ttl_seconds: float = 3600, max_bytes: int = 32 * 1024 * 1024):
+    if kind == "sqlite":
+        return SQLiteBackend(url or "risk_context.db", ttl_seconds, max_bytes)
+    if kind == "redis":
+        return RedisBackend(url or "redis://localhost:6379/0", ttl_seconds)
+    return InMemoryBackend(ttl_seconds, max_bytes)
+
+
+# Changed whenever a session's scores change, so results computed from them can be
+# invalidated. Versions come from one process-wide counter, so a session dropped
+# after the context TTL never sees an earlier version again.
+risk_versions = SessionValues(Config.RISK_CONTEXT_TTL_SECONDS)
+_version_counter = itertools.count(1)
+# Tools of one turn may run concurrently, so the read-modify-write is locked
+_versions_lock = threading.Lock()
+
+backend = create_backend(
+    Config.RISK_CONTEXT_BACKEND,
+    Config.RISK_CONTEXT_URL,
+    Config.RISK_CONTEXT_TTL_SECONDS,
+    Config.RISK_CONTEXT_MAX_BYTES,
+)
+
+
+def session_from(tool_context) -> str:
+    """Session id stored in the calling agent's state, if any"""
+    if tool_context is None:
+        return DEFAULT_SESSION
+    return tool_context.agent.state.get("session_id") or DEFAULT_SESSION
+
+
+def _bump(session_id: str):
+    with _versions_lock:
+        risk_versions.set(session_id, next(_version_counter))
+
+
+def save_risk_scores(asset_risks: dict, session_id: str = DEFAULT_SESSION, horizon_months: int = 0):
+    """Save risk scores to context (one batched write); the version changes only if a score does"""
+    current = backend.get_many(session_id, horizon_months, list(asset_risks))
+    backend.put_many(session_id, horizon_months, asset_risks)
+    if any(current.get(asset_id) != score for asset_id, score in asset_risks.items()):
+        _bump(session_id)
+
+
+def get_risk_scores(asset_ids: List[str], session_id: str = DEFAULT_SESSION, horizon_months: int = 0,
+                    default: Optional[float] = DEFAULT_RISK) -> Dict[str, float]:
+    """Get risk scores from context; unknown assets get `default`, or are omitted when it is None"""
+    found = backend.get_many(session_id, horizon_months, list(asset_ids))
+    if default is None:
+        return found
+    return {asset_id: found.get(asset_id, default) for asset_id in asset_ids}
+
+
+def get_risk_score(asset_id: str, session_id: str = DEFAULT_SESSION, horizon_months: int = 0) -> float:
     """Get risk score from context"""
-    return risk_context.get(asset_id, 0.5)  # default fallback
\ No newline at end of file
+    return get_risk_scores([asset_id], session_id, horizon_months)[asset_id]
+
+
+def risk_version(session_id: str) -> int:
+    return risk_versions.get(session_id, 0)
+
+
+def clear_session(session_id: str):
+    backend.clear(session_id)
+    _bump(session_id)
@@ -0,0 +1,142 @@
+# Answers simple, unambiguous lookups ("What assets are in portfolio p1?")
+# with a direct get_assets call, skipping the model round trip and guardrail
+# evaluation. A question must match one of the patterns completely, and a
+# handler can still pass it on by returning None; anything else goes to the agent.
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tools import get_assets
+
+ROWS_SHOWN = 25
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FastPathAnswer:
+    intent: str
+    text: str
+    elapsed_ms: float
+
+
+def _money(value: float) -> str:
+    return f"${value:,.0f}"
+
+
+def _assets(count: int) -> str:
+    return f"{count:,} asset" + ("" if count == 1 else "s")
+
+
+def _list_assets(match: re.Match, user: str) -> str:
+    portfolio_id = match["portfolio"]
+    result = get_assets(portfolio_id=portfolio_id, user=user, limit=ROWS_SHOWN)
+    if not result["success"]:
+        return result["error"]
+    if not result["data"]:
+        return f"Portfolio {portfolio_id} has no assets."
+    lines = [f"Portfolio {portfolio_id} has {_assets(result['total'])}:"]
+    lines += [f"- {a['name']} (ID {a['id']}): {_money(a['value'])}" for a in result["data"]]
+    if result["total"] > len(result["data"]):
+        lines.append(f"…and {result['total'] - len(result['data'])} more.")
+    return "\n".join(lines)
+
+
+def _portfolio_total(match: re.Match, user: str) -> str:
+    portfolio_id = match["portfolio"]
+    result = get_assets(portfolio_id=portfolio_id, user=user, aggregate=True, top_n=0)
+    if not result["success"]:
+        return result["error"]
+    data = result["data"]
+    if not data["count"]:
+        return f"Portfolio {portfolio_id} has no assets."
+    return (f"Portfolio {portfolio_id} has {_assets(data['count'])} with a total value of {_money(data['totalValue'])} "
+            f"(mean {_money(data['meanValue'])}).")
+
+
+def _show_asset(match: re.Match, user: str) -> Optional[str]:
+    result = get_assets(asset_id=match["asset"], user=user)
+    if not result["success"]:
+        # Not an asset this user can see: let the agent answer
+        return None
+    asset = result["data"]
+    return f"Asset {asset['id']} is {asset['name']} in portfolio {asset['portfolioId']}, valued at {_money(asset['value'])}."
+
+
+PORTFOLIO = r"portfolio (?P<portfolio>p\d+)"
+# Asset ids contain a digit ("7", "A0001234"), so "asset risk" is not a lookup
+ASSET_ID = r"(?P<asset>[A-Za-z_-]*\d[\w-]*)"
+# (intent, full-match pattern, handler returning the answer or None)
+INTENTS: List[Tuple[str, "re.Pattern", Callable[[re.Match, str], Optional[str]]]] = [
+    ("list_assets", re.compile(rf"(?:what|which) assets are (?:in|on) {PORTFOLIO}", re.I), _list_assets),
+    ("list_assets", re.compile(rf"(?:list|show)(?: me)?(?: the| all)? assets (?:in|of|for) {PORTFOLIO}", re.I), _list_assets),
+    ("portfolio_total", re.compile(rf"what is the total value of {PORTFOLIO}", re.I), _portfolio_total),
+    ("show_asset", re.compile(rf"(?:what is|show(?: me)?) asset (?:id )?{ASSET_ID}", re.I), _show_asset),
+]
+
+
+class FastPathRouter:
+    """Routes questions to INTENTS, keeping hit rate and estimated latency saved"""
+
+    def __init__(self, intents=INTENTS):
+        self.intents = intents
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        # Running mean of answers through the agent, to estimate what a hit saves
+        self.agent_ms = 0.0
+        self.agent_answers = 0
+        self._lock = threading.Lock()
+
+    def answer(self, prompt: str, user: str) -> Optional[FastPathAnswer]:
+        question = " ".join(prompt.split()).rstrip("?.! ")
+        for intent, pattern, handler in self.intents:
+            match = pattern.fullmatch(question)
+            if match:
+                start = time.perf_counter()
+                text = handler(match, user)
+                if text is None:
+                    break
+                answer = FastPathAnswer(intent, text, (time.perf_counter() - start) * 1000)
+                self._record_hit(answer)
+                return answer
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _record_hit(self, answer: FastPathAnswer):
+        with self._lock:
+            self.hits += 1
+            saved = max(0.0, self.agent_ms - answer.elapsed_ms) if self.agent_answers else 0.0
+            self.saved_ms += saved
+            hit_rate = self.hits / (self.hits + self.misses)
+        logger.info("Fast path: %s in %.1f ms, ~%.0f ms saved (hit rate %.0f%%, ~%.1f s saved in total)",
+                    answer.intent, answer.elapsed_ms, saved, hit_rate * 100, self.saved_ms / 1000)
+
+    def record_agent(self, elapsed_ms: Optional[float]):
+        """Report how long a question answered by the agent took"""
+        if elapsed_ms is None:
+            return
+        with self._lock:
+            self.agent_answers += 1
+            self.agent_ms += (elapsed_ms - self.agent_ms) / self.agent_answers
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            routed = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hitRate": self.hits / routed if routed else 0.0,
+                    "savedSeconds": self.saved_ms / 1000}
+
+
+router = FastPathRouter()
+
+
+def remember(agent, prompt: str, answer: FastPathAnswer):
+    """Add a fast-path exchange to the agent's conversation, so follow-up questions have its context"""
+    if agent.messages and agent.messages[-1]["role"] == "user":
+        return
+    agent.messages.append({"role": "user", "content": [{"text": prompt}]})
+    agent.messages.append({"role": "assistant", "content": [{"text": answer.text}]})
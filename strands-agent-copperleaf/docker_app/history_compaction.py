@@ -0,0 +1,155 @@
+# Keeps the conversation sent to the model within a token budget. After each
+# question, tool results the model has already answered from are replaced by
+# a one-line summary (a memoized tool call brings the details back cheaply),
+# except the latest optimization result, which stays structured. If the
+# history is still over budget, the oldest questions are dropped whole.
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from strands.agent.conversation_manager import ConversationManager
+from strands.types.exceptions import ContextWindowOverflowException
+
+from token_count import estimate_tokens
+
+COMPACTED = "[compacted]"
+CARRIED = "[kept from an earlier question]"
+KEPT_TOOLS = ("optimize_investments",)
+
+logger = logging.getLogger(__name__)
+
+
+def block_tokens(block: Dict[str, Any]) -> int:
+    if "text" in block:
+        return estimate_tokens(block["text"])
+    if "toolResult" in block:
+        return sum(estimate_tokens(c.get("text", c.get("json"))) for c in block["toolResult"].get("content", []))
+    return estimate_tokens(block)
+
+
+def history_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Approximate tokens of a message list, as sent to the model"""
+    return sum(block_tokens(b) for m in messages for b in m.get("content", []))
+
+
+def _payload(tool_result: Dict[str, Any]) -> Optional[Any]:
+    content = tool_result.get("content") or [{}]
+    if "json" in content[0]:
+        return content[0]["json"]
+    try:
+        return json.loads(content[0].get("text", ""))
+    except ValueError:
+        return None
+
+
+def summarize_result(name: str, result: Any) -> str:
+    """One line standing in for a consumed tool result"""
+    if not isinstance(result, dict):
+        return f"{COMPACTED} {name} result omitted."
+    if not result.get("success", True):
+        return f"{COMPACTED} {name} failed: {result.get('error', 'unknown error')}"
+    data = result.get("data")
+    if name == "get_assets" and isinstance(data, list):
+        summary = f"{len(data)} of {result.get('total', len(data))} assets listed"
+    elif name == "get_assets" and isinstance(data, dict) and "portfolios" in data:
+        summary = (f"{data['count']} assets in {result.get('total', len(data['portfolios']))} portfolios, "
+                   f"total value {data['totalValue']:,}")
+    elif name == "analyze_risk" and isinstance(data, dict):
+        scores = data.get("riskAnalysis", [])
+        top = max(scores, key=lambda s: s["riskScore"], default=None)
+        summary = f"risk scored for {len(scores)} assets and saved to the session"
+        if top:
+            summary += f"; highest {top['riskScore']} ({top['assetId']})"
+    elif name == "optimize_investments" and isinstance(data, dict):
+        summary = (f"{len(data.get('selectedInvestments', []))} interventions selected for {data['totalCost']:,.0f}, "
+                   f"risk reduction {data['totalRiskReduction']}")
+    elif name == "investment_frontier" and isinstance(data, dict):
+        summary = f"frontier {data.get('frontierId')} with {len(data.get('curve', []))} points"
+    else:
+        summary = "result omitted"
+    return f"{COMPACTED} {name}: {summary}. Call the tool again for details."
+
+
+class CompactingConversationManager(ConversationManager):
+    """Summarizes consumed tool results, then drops the oldest questions, to stay within token_budget"""
+
+    def __init__(self, token_budget: int, kept_tools=KEPT_TOOLS):
+        super().__init__()
+        self.token_budget = token_budget
+        self.kept_tools = kept_tools
+        # Approximate tokens of the history before and after the latest compaction
+        self.last_report = {"before": 0, "after": 0, "saved": 0}
+        self.tokens_saved = 0
+
+    @staticmethod
+    def _tool_names(messages: List[Dict[str, Any]]) -> Dict[str, str]:
+        return {b["toolUse"]["toolUseId"]: b["toolUse"]["name"]
+                for m in messages for b in m.get("content", []) if "toolUse" in b}
+
+    def _kept_result(self, messages, names) -> Optional[str]:
+        """toolUseId of the latest successful result of a kept tool"""
+        for message in reversed(messages):
+            for block in reversed(message.get("content", [])):
+                result = block.get("toolResult")
+                if result and names.get(result["toolUseId"]) in self.kept_tools and result.get("status") != "error":
+                    payload = _payload(result)
+                    if isinstance(payload, dict) and payload.get("success"):
+                        return result["toolUseId"]
+        return None
+
+    def _compact_results(self, messages, names, kept: Optional[str]):
+        for message in messages:
+            for block in message.get("content", []):
+                result = block.get("toolResult")
+                if not result or result["toolUseId"] == kept:
+                    continue
+                content = result.get("content") or [{}]
+                if content[0].get("text", "").startswith(COMPACTED):
+                    continue
+                name = names.get(result["toolUseId"], "tool")
+                result["content"] = [{"text": summarize_result(name, _payload(result))}]
+
+    @staticmethod
+    def _question_starts(messages) -> List[int]:
+        return [i for i, m in enumerate(messages)
+                if m["role"] == "user" and not any("toolResult" in b for b in m.get("content", []))]
+
+    def _drop_oldest_question(self, messages, kept: Optional[str]) -> bool:
+        """Remove the oldest question and its answer, carrying the kept result forward"""
+        starts = self._question_starts(messages)
+        if len(starts) < 2:
+            return False
+        dropped, remaining = messages[:starts[1]], messages[starts[1]:]
+        retained = {b["toolResult"]["toolUseId"] for m in remaining for b in m.get("content", []) if "toolResult" in b}
+        # A carried result is stale once a newer kept result is still in the history
+        carried = [] if kept in retained else [
+            b for b in dropped[0].get("content", []) if b.get("text", "").startswith(CARRIED)]
+        for message in dropped:
+            for block in message.get("content", []):
+                if kept is not None and block.get("toolResult", {}).get("toolUseId") == kept:
+                    payload = json.dumps(_payload(block["toolResult"]), separators=(",", ":"))
+                    carried = [{"text": f"{CARRIED} Latest optimize_investments result: {payload}"}]
+        remaining[0]["content"][:0] = carried
+        messages[:] = remaining
+        self.removed_message_count += len(dropped)
+        return True
+
+    def apply_management(self, agent, **kwargs: Any) -> None:
+        messages = agent.messages
+        before = history_tokens(messages)
+        names = self._tool_names(messages)
+        kept = self._kept_result(messages, names)
+        self._compact_results(messages, names, kept)
+        while history_tokens(messages) > self.token_budget and self._drop_oldest_question(messages, kept):
+            pass
+        after = history_tokens(messages)
+        self.last_report = {"before": before, "after": after, "saved": before - after}
+        self.tokens_saved += before - after
+        if before != after:
+            logger.info("History compacted: ~%d -> ~%d tokens (%d saved, %d saved this session)",
+                        before, after, before - after, self.tokens_saved)
+
+    def reduce_context(self, agent, e: Optional[Exception] = None, **kwargs: Any) -> None:
+        names = self._tool_names(agent.messages)
+        if not self._drop_oldest_question(agent.messages, self._kept_result(agent.messages, names)):
+            raise ContextWindowOverflowException("History cannot be reduced further") from e
@@ -0,0 +1,377 @@
+"""Multiple-choice knapsack solver used by the investment optimization tool.
+
+Every asset is a group and every intervention candidate an item: at most one
+item per group may be selected, total cost must stay within the budget and
+the total risk reduction is maximized.
+
+The solver works in three steps:
+1. Dominated items are dropped and the upper convex hull of each group gives
+   the LP relaxation, solved greedily by efficiency. Its value is an upper
+   bound on the true optimum.
+2. Groups far from the LP break item are fixed to their LP choice.
+3. The remaining "core" groups are solved with a dynamic program over a
+   budget grid. The grid is exact when costs share a common divisor that
+   keeps it small enough, otherwise costs are rounded up (always feasible).
+
+The gap between the selected value and the LP bound is reported so callers
+know how far from optimal the plan can be.
+
+`Frontier` runs the same DP once over all groups up to a maximum budget so
+that any smaller budget is answered by lookup instead of a new solve.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Maximum number of budget cells in the dynamic program
+MAX_CELLS = 4096
+# Number of LP increments around the break item whose groups are solved by DP
+CORE_SIZE = 2048
+# Memory limits for frontier choice tables (one byte per asset and budget cell)
+FRONTIER_TABLE_BYTES = 32 * 1024 * 1024
+FRONTIER_CACHE_BYTES = 128 * 1024 * 1024
+
+
+@dataclass
+class KnapsackSolution:
+    selected: np.ndarray
+    total_cost: float
+    total_value: float
+    upper_bound: float
+    exact: bool
+
+    @property
+    def gap(self) -> float:
+        """Relative distance between the selected value and the upper bound"""
+        if self.exact or self.upper_bound <= 0:
+            return 0.0
+        return max(0.0, (self.upper_bound - self.total_value) / self.upper_bound)
+
+
+def _undominated(group: np.ndarray, cost: np.ndarray, value: np.ndarray, budget: float) -> np.ndarray:
+    """Return indices of useful items sorted by (group, cost)"""
+    candidates = np.flatnonzero((cost <= budget) & (value > 0) & (cost >= 0))
+    if candidates.size == 0:
+        return candidates
+    order = candidates[np.lexsort((-value[candidates], cost[candidates], group[candidates]))]
+
+    # An item is kept only if it beats every cheaper item of its group.
+    # Dense value ranks offset by group make the segmented running max exact.
+    _, rank = np.unique(value[order], return_inverse=True)
+    key = group[order].astype(np.int64) * (int(rank.max()) + 2) + rank
+    previous_max = np.concatenate(([-1], np.maximum.accumulate(key)[:-1]))
+    return order[key > previous_max]
+
+
+def _hull(items: np.ndarray, group: np.ndarray, cost: np.ndarray, value: np.ndarray) -> np.ndarray:
+    """Reduce undominated items (sorted by group, cost) to each group's upper convex hull"""
+    keep = items
+    while True:
+        g = group[keep]
+        first = np.concatenate(([True], g[1:] != g[:-1]))
+        previous_cost = np.where(first, 0.0, np.concatenate(([0.0], cost[keep][:-1])))
+        previous_value = np.where(first, 0.0, np.concatenate(([0.0], value[keep][:-1])))
+        with np.errstate(divide="ignore"):
+            slope = (value[keep] - previous_value) / (cost[keep] - previous_cost)
+        # A point lies under the hull when the next segment of its group is at least as steep
+        next_same_group = np.concatenate((g[1:] == g[:-1], [False]))
+        next_slope = np.concatenate((slope[1:], [-np.inf]))
+        below = next_same_group & (slope <= next_slope)
+        if not below.any():
+            return keep
+        keep = keep[~below]
+
+
+def _increments(hull: np.ndarray, group: np.ndarray, cost: np.ndarray, value: np.ndarray):
+    """Return (cost, value, slope) of each hull step, relative to the previous step of its group"""
+    g = group[hull]
+    first = np.concatenate(([True], g[1:] != g[:-1]))
+    d_cost = cost[hull] - np.where(first, 0.0, np.concatenate(([0.0], cost[hull][:-1])))
+    d_value = value[hull] - np.where(first, 0.0, np.concatenate(([0.0], value[hull][:-1])))
+    with np.errstate(divide="ignore"):
+        slope = d_value / d_cost
+    return d_cost, d_value, slope
+
+
+def _lp_greedy(hull: np.ndarray, group: np.ndarray, cost: np.ndarray, value: np.ndarray, budget: float):
+    """Solve the LP relaxation greedily over hull increments.
+
+    Returns the increment order, the number of increments that fit entirely
+    and the LP upper bound.
+    """
+    d_cost, d_value, slope = _increments(hull, group, cost, value)
+    order = np.argsort(-slope, kind="stable")
+    cumulative_cost = np.cumsum(d_cost[order])
+    cumulative_value = np.cumsum(d_value[order])
+    fitted = int(np.searchsorted(cumulative_cost, budget, side="right"))
+    used_cost = cumulative_cost[fitted - 1] if fitted else 0.0
+    used_value = cumulative_value[fitted - 1] if fitted else 0.0
+    if fitted < order.size:
+        upper_bound = used_value + (budget - used_cost) * slope[order[fitted]]
+    else:
+        upper_bound = used_value
+    return order, fitted, float(upper_bound)
+
+
+def _last_per_group(items: np.ndarray, group: np.ndarray, cost: np.ndarray) -> np.ndarray:
+    """Keep the most expensive item of each group"""
+    if items.size == 0:
+        return items
+    items = items[np.lexsort((cost[items], group[items]))]
+    g = group[items]
+    return items[np.concatenate((g[1:] != g[:-1], [True]))]
+
+
+def _budget_grid(cost: np.ndarray, budget: float, max_cells: int):
+    """Return (weights, cells, unit, exact) for costs on a budget grid"""
+    integral = np.all(cost == np.floor(cost)) and float(budget).is_integer()
+    if integral:
+        positive = cost[cost > 0].astype(np.int64)
+        unit = int(np.gcd.reduce(positive)) if positive.size else 1
+        cells = int(budget // unit)
+        if cells <= max_cells:
+            return (cost // unit).astype(np.int64), cells, float(unit), True
+    unit = budget / max_cells
+    return np.ceil(cost / unit).astype(np.int64), max_cells, unit, False
+
+
+@dataclass
+class _Table:
+    """Dynamic program over a budget grid, kept to answer any budget up to its size"""
+    items: np.ndarray
+    weights: np.ndarray
+    starts: np.ndarray
+    choice: np.ndarray
+    best: np.ndarray
+    unit: float
+    exact: bool
+
+    @property
+    def cells(self) -> int:
+        return self.best.size - 1
+
+    def backtrack(self, cell: int) -> np.ndarray:
+        """Return the items of the best selection using at most `cell` grid cells"""
+        selected = []
+        for k in range(self.starts.size - 1, -1, -1):
+            picked = self.choice[k, cell]
+            if picked:
+                j = self.starts[k] + picked - 1
+                selected.append(self.items[j])
+                cell -= self.weights[j]
+        return np.array(selected, dtype=np.int64)
+
+
+def _dp_table(items: np.ndarray, group: np.ndarray, cost: np.ndarray, value: np.ndarray, budget: float, max_cells: int):
+    """Run the multiple-choice knapsack DP over items sorted by group.
+
+    Returns None when nothing fits.
+    """
+    if items.size == 0 or budget < 0:
+        return None
+    if budget == 0:
+        weights, cells, unit, exact = np.zeros(items.size, dtype=np.int64), 0, 1.0, True
+    else:
+        weights, cells, unit, exact = _budget_grid(cost[items], budget, max_cells)
+    fits = weights <= cells
+    items, weights = items[fits], weights[fits]
+    if items.size == 0:
+        return None
+
+    g = group[items]
+    starts = np.flatnonzero(np.concatenate(([True], g[1:] != g[:-1])))
+    ends = np.concatenate((starts[1:], [items.size]))
+    largest_group = int((ends - starts).max())
+    choice = np.zeros((starts.size, cells + 1), dtype=np.min_scalar_type(largest_group))
+    dp = np.zeros(cells + 1)
+    item_values = value[items]
+
+    for k, (start, end) in enumerate(zip(starts, ends)):
+        best = dp.copy()
+        row = choice[k]
+        for j in range(start, end):
+            w = weights[j]
+            candidate = dp[:cells + 1 - w] + item_values[j]
+            better = candidate > best[w:]
+            best[w:][better] = candidate[better]
+            row[w:][better] = j - start + 1
+        dp = best
+
+    return _Table(items, weights, starts, choice, dp, unit, exact)
+
+
+def solve_mckp(group: np.ndarray, cost: np.ndarray, value: np.ndarray, budget: float,
+               max_cells: int = MAX_CELLS, core_size: int = CORE_SIZE) -> KnapsackSolution:
+    """Select at most one item per group maximizing total value within budget.
+
+    group: group index per item (e.g. asset)
+    cost: cost per item
+    value: value per item (e.g. risk reduction)
+    """
+    group = np.asarray(group, dtype=np.int64)
+    cost = np.asarray(cost, dtype=np.float64)
+    value = np.asarray(value, dtype=np.float64)
+
+    items = _undominated(group, cost, value, budget)
+    if items.size == 0:
+        return KnapsackSolution(items, 0.0, 0.0, 0.0, True)
+
+    hull = _hull(items, group, cost, value)
+    order, fitted, upper_bound = _lp_greedy(hull, group, cost, value, budget)
+
+    # Greedy integer solution: deepest hull item taken per group
+    greedy = _last_per_group(hull[order[:fitted]], group, cost)
+
+    # Groups whose increments sit around the break item are solved by DP
+    window = order[max(0, fitted - core_size // 2):fitted + core_size // 2]
+    core_groups = np.unique(group[hull[window]])
+    all_groups = np.unique(group[items])
+    fixed = greedy[~np.isin(group[greedy], core_groups)]
+    residual = budget - cost[fixed].sum()
+
+    core_items = items[np.isin(group[items], core_groups)]
+    table = _dp_table(core_items, group, cost, value, residual, max_cells)
+    if table is None:
+        selected, exact_grid = fixed, True
+    else:
+        selected, exact_grid = np.concatenate((fixed, table.backtrack(table.cells))), table.exact
+
+    if value[greedy].sum() > value[selected].sum():
+        selected = greedy
+
+    exact = exact_grid and core_groups.size == all_groups.size
+    total_value = float(value[selected].sum())
+    return KnapsackSolution(
+        selected=np.sort(selected),
+        total_cost=float(cost[selected].sum()),
+        total_value=total_value,
+        upper_bound=total_value if exact else max(upper_bound, total_value),
+        exact=exact,
+    )
+
+
+
+class Frontier:
+    """Optimal selections for every budget up to `max_budget`, from a single DP pass.
+
+    Any budget in range is answered by a table lookup (value) or a backtrack
+    over the stored choices (selection) instead of a new solve.
+    """
+
+    def __init__(self, group: np.ndarray, cost: np.ndarray, value: np.ndarray, max_budget: float,
+                 max_cells: int = MAX_CELLS, max_table_bytes: int = FRONTIER_TABLE_BYTES):
+        self.group = np.asarray(group, dtype=np.int64)
+        self.cost = np.asarray(cost, dtype=np.float64)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.max_budget = float(max_budget)
+
+        items = _undominated(self.group, self.cost, self.value, self.max_budget)
+        groups = max(1, np.unique(self.group[items]).size)
+        cells = max(1, min(max_cells, max_table_bytes // groups - 1))
+        self._table = _dp_table(items, self.group, self.cost, self.value, self.max_budget, cells)
+
+        # LP bound at every budget: cumulative hull increments, in efficiency order
+        self._lp_cost = np.zeros(1)
+        self._lp_value = np.zeros(1)
+        self._greedy_items = self._greedy_cost = self._greedy_value = np.empty(0)
+        if items.size:
+            hull = _hull(items, self.group, self.cost, self.value)
+            d_cost, d_value, slope = _increments(hull, self.group, self.cost, self.value)
+            order = np.argsort(-slope, kind="stable")
+            lp_cost = np.concatenate(([0.0], np.cumsum(d_cost[order])))
+            lp_value = np.concatenate(([0.0], np.cumsum(d_value[order])))
+            last_of_cost = np.concatenate((lp_cost[1:] != lp_cost[:-1], [True]))
+            self._lp_cost, self._lp_value = lp_cost[last_of_cost], lp_value[last_of_cost]
+            self._greedy_items = hull[order]
+            self._greedy_cost = lp_cost[1:]
+            self._greedy_value = lp_value[1:]
+
+    @property
+    def nbytes(self) -> int:
+        table = self._table
+        return 0 if table is None else table.choice.nbytes + table.best.nbytes
+
+    def covers(self, budget: float) -> bool:
+        return 0 <= budget <= self.max_budget
+
+    def _cell(self, budget: float) -> int:
+        return min(self._table.cells, int(budget // self._table.unit))
+
+    def _greedy_fitted(self, budget: float) -> int:
+        return int(np.searchsorted(self._greedy_cost, budget, side="right"))
+
+    def _greedy_value_at(self, budget: float) -> float:
+        fitted = self._greedy_fitted(budget)
+        return float(self._greedy_value[fitted - 1]) if fitted else 0.0
+
+    def value_at(self, budget: float) -> float:
+        """Best total value within budget (table lookup)"""
+        dp_value = 0.0 if self._table is None else float(self._table.best[self._cell(budget)])
+        return max(dp_value, self._greedy_value_at(budget))
+
+    def upper_bound(self, budget: float) -> float:
+        """LP relaxation bound on the optimum within budget"""
+        return float(np.interp(budget, self._lp_cost, self._lp_value))
+
+    def select(self, budget: float) -> KnapsackSolution:
+        """Best selection within budget (backtrack over stored choices).
+
+        On coarse grids the LP greedy prefix, which is nested across budgets,
+        can beat the rounded DP; the better of the two is returned.
+        """
+        if self._table is None:
+            return KnapsackSolution(np.empty(0, dtype=np.int64), 0.0, 0.0, 0.0, True)
+        selected = self._table.backtrack(self._cell(budget))
+        exact = self._table.exact
+        if not exact and self._greedy_value_at(budget) > self.value[selected].sum():
+            selected = _last_per_group(self._greedy_items[:self._greedy_fitted(budget)], self.group, self.cost)
+        selected = np.sort(selected)
+        total_value = float(self.value[selected].sum())
+        return KnapsackSolution(
+            selected=selected,
+            total_cost=float(self.cost[selected].sum()),
+            total_value=total_value,
+            upper_bound=total_value if exact else max(self.upper_bound(budget), total_value),
+            exact=exact,
+        )
+
+    def curve(self, points: int = 11, max_budget: Optional[float] = None) -> List[Dict[str, float]]:
+        """Compact value-vs-budget curve at evenly spaced budgets"""
+        max_budget = self.max_budget if max_budget is None else min(max_budget, self.max_budget)
+        exact = self._table is None or self._table.exact
+        curve = []
+        for budget in np.linspace(0, max_budget, max(2, points)):
+            value = self.value_at(budget)
+            upper_bound = value if exact else max(self.upper_bound(budget), value)
+            curve.append({
+                "budget": float(budget),
+                "totalRiskReduction": round(value, 6),
+                "upperBound": round(upper_bound, 6),
+            })
+        return curve
+
+
+class FrontierCache:
+    """LRU cache of frontiers keyed by candidate set, bounded by table memory"""
+
+    def __init__(self, max_bytes: int = FRONTIER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Frontier, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Frontier, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, frontier: Frontier, context: Any = None):
+        with self._lock:
+            self._entries[key] = (frontier, context)
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1 and sum(f.nbytes for f, _ in self._entries.values()) > self.max_bytes:
+                self._entries.popitem(last=False)
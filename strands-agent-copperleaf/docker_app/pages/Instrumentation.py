@@ -0,0 +1,3 @@
+from instrumentation import render_summary
+
+render_summary()
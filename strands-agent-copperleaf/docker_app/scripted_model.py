@@ -0,0 +1,155 @@
+# Offline stand-in for strands.models.BedrockModel. It replays scripted tool
+# calls and answers with Bedrock-shaped stream events and configurable
+# latency, so the agent, tools and UI can be exercised (and load tested)
+# without Bedrock calls.
+import asyncio
+import json
+import random
+from typing import Any, AsyncIterable, Dict, List, Optional
+
+from strands.models import Model
+
+# A step is a tool call {"tool": name, "input": dict or callable(previous results) -> dict},
+# several tool calls made in one turn {"tools": [tool call, ...]},
+# or a final answer {"text": str or callable(previous results) -> str}.
+# Structured output is a tool call named after the output model, as with Bedrock.
+Step = Dict[str, Any]
+
+
+def _asset_ids(results: List[Dict[str, Any]]) -> List[str]:
+    """Asset ids of the latest get_assets listing"""
+    for result in reversed(results):
+        if isinstance(result.get("data"), list):
+            return [asset["id"] for asset in result["data"]]
+    return []
+
+
+def _summary(results: List[Dict[str, Any]]) -> str:
+    latest = results[-1] if results else {}
+    if not latest.get("success", False):
+        return f"The request could not be completed: {latest.get('error', 'no data')}."
+    data = latest.get("data", {})
+    if "selectedInvestments" in data:
+        return (f"The optimal plan funds {len(data['selectedInvestments'])} interventions for "
+                f"${data['totalCost']:,.0f}, reducing total risk by {data['totalRiskReduction']:.3f}.")
+    if "riskAnalysis" in data:
+        scores = [item["riskScore"] for item in data["riskAnalysis"]]
+        return f"Analyzed {len(scores)} assets; the highest risk score is {max(scores, default=0):.3f}."
+    return f"Found {len(data) if isinstance(data, list) else data.get('count', 0)} assets."
+
+
+def capital_planning_scripts(portfolio_id: str = "p1", budget: float = 2_000_000, horizon_months: int = 12,
+                             user: str = "User 1") -> Dict[str, List[Step]]:
+    """Tool sequences the capital planning agent typically runs, keyed by a prompt keyword"""
+    assets = {"tool": "get_assets", "input": {"portfolio_id": portfolio_id, "user": user}}
+    risk = {"tool": "analyze_risk",
+            "input": lambda results: {"asset_ids": _asset_ids(results), "horizon_months": horizon_months, "user": user}}
+    optimize = {"tool": "optimize_investments",
+                "input": {"budget": budget, "portfolio_id": portfolio_id, "horizon_months": horizon_months, "user": user}}
+    answer = {"text": _summary}
+    # Three portfolios listed, then simulated, each in a single turn of parallel tool calls
+    compared = [f"p{i}" for i in range(1, 4)]
+    list_all = {"tools": [{"tool": "get_assets", "input": {"portfolio_id": p, "user": user}} for p in compared]}
+    simulate_all = {"tools": [
+        {"tool": "analyze_risk",
+         "input": lambda results, i=i: {"asset_ids": [a["id"] for a in results[i]["data"]], "horizon_months": horizon_months,
+                                        "user": user, "simulate": True}}
+        for i in range(len(compared))]}
+    return {
+        "compare": [list_all, simulate_all, answer],
+        "optimize": [assets, risk, optimize, answer],
+        "risk": [assets, risk, answer],
+        "assets": [assets, answer],
+    }
+
+
+class ScriptedModel(Model):
+    """Replays a script chosen by keyword from the latest user prompt.
+
+    The position in the script is derived from the conversation itself, so
+    one instance can be shared by many agents, like a cached BedrockModel.
+    Latency per model turn is first_token_ms (+/- jitter) followed by text
+    streamed at tokens_per_second.
+    """
+
+    def __init__(self, scripts: Optional[Dict[str, List[Step]]] = None, first_token_ms: float = 800,
+                 tokens_per_second: float = 60, jitter: float = 0.2, seed: Optional[int] = None, **model_config: Any):
+        self.scripts = capital_planning_scripts() if scripts is None else scripts
+        self.first_token_ms = first_token_ms
+        self.tokens_per_second = tokens_per_second
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        # BedrockModel arguments (model_id, guardrail_*, ...) are accepted and kept for get_config
+        self.config = dict(model_config)
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Build output_model from the scripted call of the tool named after it, at the current step"""
+        step, results = self._turn(prompt)
+        calls = [call for call in step.get("tools", [step]) if call.get("tool") == output_model.__name__]
+        if not calls:
+            raise ValueError(f"No scripted {output_model.__name__} tool call for this prompt")
+        await asyncio.sleep(self._delay(self.first_token_ms))
+        yield {"output": output_model(**self._tool_input(calls[0], results))}
+
+    @staticmethod
+    def _tool_input(call: Step, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return call["input"](results) if callable(call["input"]) else call["input"]
+
+    def _turn(self, messages: List[Dict[str, Any]]):
+        """Script of the latest prompt, the results of the tools run for it so far, and the next step"""
+        results = []
+        prompt = ""
+        turns = 0
+        for message in reversed(messages):
+            blocks = message.get("content", [])
+            tool_results = [b["toolResult"] for b in blocks if "toolResult" in b]
+            if message["role"] == "user" and not tool_results:
+                prompt = " ".join(b.get("text", "") for b in blocks).lower()
+                break
+            turns += message["role"] == "assistant"
+            for result in tool_results[::-1]:
+                content = result.get("content") or [{}]
+                text = content[0].get("text")
+                results.insert(0, json.loads(text) if text else content[0].get("json", {}))
+        script = next((steps for keyword, steps in self.scripts.items() if keyword in prompt), [])
+        step = script[turns] if turns < len(script) else {"text": "Done."}
+        return step, results
+
+    def _delay(self, milliseconds: float) -> float:
+        return max(0.0, milliseconds * (1 + self._random.uniform(-self.jitter, self.jitter))) / 1000
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs) -> AsyncIterable[Dict[str, Any]]:
+        step, results = self._turn(messages)
+        await asyncio.sleep(self._delay(self.first_token_ms))
+        yield {"messageStart": {"role": "assistant"}}
+
+        if "tool" in step or "tools" in step:
+            output_tokens = 0
+            for call in step.get("tools", [step]):
+                tool_input = json.dumps(self._tool_input(call, results))
+                tool_use_id = f"tooluse_{self._random.getrandbits(48):012x}"
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": tool_use_id, "name": call["tool"]}}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": tool_input}}}}
+                yield {"contentBlockStop": {}}
+                output_tokens += len(tool_input) // 4
+            stop_reason = "tool_use"
+        else:
+            text = step["text"](results) if callable(step["text"]) else step["text"]
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                await asyncio.sleep(self._delay(1000 / self.tokens_per_second))
+                yield {"contentBlockDelta": {"delta": {"text": word if i == len(words) - 1 else word + " "}}}
+            yield {"contentBlockStop": {}}
+            stop_reason, output_tokens = "end_turn", len(words)
+
+        yield {"messageStop": {"stopReason": stop_reason}}
+        input_tokens = sum(len(json.dumps(m.get("content", []))) for m in messages) // 4
+        yield {"metadata": {"usage": {"inputTokens": input_tokens, "outputTokens": output_tokens,
+                                      "totalTokens": input_tokens + output_tokens},
+                            "metrics": {"latencyMs": 0}}}
@@ -0,0 +1,12 @@
+# Approximate LLM token counts of tool results, for reporting payload sizes.
+# Bedrock does not expose its tokenizers locally; ~4 characters of compact
+# JSON per token is close enough to compare result modes.
+import json
+from typing import Any
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(value: Any) -> int:
+    text = value if isinstance(value, str) else json.dumps(value, separators=(",", ":"), default=str)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
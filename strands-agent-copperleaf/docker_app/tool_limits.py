@@ -0,0 +1,96 @@
+# Bounds tool execution once the agent runs the tool calls of a model turn
+# concurrently. Every tool runs on one shared, bounded thread pool, each tool
+# has a concurrency limit across all sessions, and a call that exceeds its
+# timeout returns an error result to the model instead of holding up the
+# turn (the work itself finishes in the background, keeping its slot).
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Dict
+
+from config_file import Config
+
+logger = logging.getLogger(__name__)
+
+
+def parse_limits(value: str) -> Dict[str, float]:
+    """"tool=n,tool=n" -> {tool: n}"""
+    limits = {}
+    for item in value.split(","):
+        name, _, number = item.partition("=")
+        if name.strip() and number.strip():
+            limits[name.strip()] = float(number)
+    return limits
+
+
+class ToolLimits:
+    """Shared tool pool with per-tool semaphores, timeouts and counters"""
+
+    def __init__(self, workers: int, concurrency: Dict[str, float], timeout_seconds: float,
+                 timeouts: Dict[str, float] = None):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.timeout_seconds = timeout_seconds
+        self.timeouts = timeouts or {}
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tool")
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, name: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(name)
+            if semaphore is None:
+                limit = int(self.concurrency.get(name, self.workers))
+                semaphore = self._semaphores[name] = threading.BoundedSemaphore(max(1, limit))
+            return semaphore
+
+    def _count(self, name: str, field: str, amount: float = 1):
+        with self._lock:
+            stats = self._stats.setdefault(name, {"calls": 0, "timeouts": 0, "busy": 0, "queuedSeconds": 0.0})
+            stats[field] += amount
+
+    def run(self, name: str, func, *args, **kwargs):
+        """Run func on the pool within the tool's limit; an error result on timeout"""
+        timeout = self.timeouts.get(name, self.timeout_seconds)
+        deadline = time.monotonic() + timeout
+        semaphore = self._semaphore(name)
+        self._count(name, "calls")
+        if not semaphore.acquire(timeout=timeout):
+            self._count(name, "busy")
+            logger.warning("Tool %s: no slot free within %g s", name, timeout)
+            return {"success": False, "error": f"{name} is busy, try again shortly"}
+        try:
+            future = self.pool.submit(func, *args, **kwargs)
+        except BaseException:
+            semaphore.release()
+            raise
+        # The slot is held until the work ends, even after a timeout
+        future.add_done_callback(lambda _: semaphore.release())
+        self._count(name, "queuedSeconds", timeout - (deadline - time.monotonic()))
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            self._count(name, "timeouts")
+            logger.warning("Tool %s timed out after %g s", name, timeout)
+            return {"success": False, "error": f"{name} did not finish within {timeout:g} seconds"}
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+tool_limits = ToolLimits(Config.TOOL_POOL_WORKERS, parse_limits(Config.TOOL_CONCURRENCY),
+                         Config.TOOL_TIMEOUT_SECONDS, parse_limits(Config.TOOL_TIMEOUTS))
+
+
+def limited(func):
+    """Run a tool function under `tool_limits` (apply below @tool, above @memoize)"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return tool_limits.run(func.__name__, func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,104 @@
+# Memoizes tool results per conversation. Within one exchange the agent often
+# repeats get_assets / analyze_risk with identical arguments; a repeat is
+# answered from here instead of recomputed. Entries are keyed by
+# (session, tool, normalized arguments, data versions), so a change to the
+# asset register or to the session's risk scores invalidates them.
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config_file import Config
+from context_storage import session_from
+
+
+class ToolMemo:
+    """LRU of tool results with a TTL, plus hit/miss counters per session"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (result, seconds the original call took, expiry)
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float, float]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, session_id: str, field: str, amount: float = 1):
+        stats = self._stats.setdefault(session_id, {"hits": 0, "misses": 0, "savedSeconds": 0.0})
+        stats[field] += amount
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._count(key[0], "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(key[0], "hits")
+            self._count(key[0], "savedSeconds", entry[1])
+            return entry[0]
+
+    def put(self, key: Tuple, result: Any, elapsed: float):
+        with self._lock:
+            self._entries[key] = (result, elapsed, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self, session_id: str) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stats.get(session_id, {"hits": 0, "misses": 0, "savedSeconds": 0.0}))
+
+    def clear(self, session_id: str):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == session_id]:
+                del self._entries[key]
+            self._stats.pop(session_id, None)
+
+
+tool_memo = ToolMemo(Config.TOOL_MEMO_MAX_ENTRIES, Config.TOOL_MEMO_TTL_SECONDS)
+
+
+def memoize(versions: Callable[[str], tuple] = lambda session_id: (),
+            on_hit: Optional[Callable[[Any, Dict[str, Any], str], None]] = None,
+            prepare: Optional[Callable[[Dict[str, Any], str], None]] = None):
+    """Memoize a tool function (apply below @tool).
+
+    `versions(session_id)` returns the versions of the data the result depends
+    on. `on_hit(result, arguments, session_id)` replays side effects of the
+    original call, such as saving risk scores to the session context.
+    `prepare(arguments, session_id)` runs before the key is computed, for
+    side effects of the call that change those versions.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            session_id = session_from(arguments.pop("tool_context", None))
+            if prepare:
+                prepare(arguments, session_id)
+            key = (session_id, func.__name__, json.dumps(arguments, sort_keys=True, default=str), versions(session_id))
+
+            result = tool_memo.get(key)
+            if result is not None:
+                if on_hit:
+                    on_hit(result, arguments, session_id)
+                return result
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            tool_memo.put(key, result, time.perf_counter() - start)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,5 @@
 from .asset_tool import get_assets
 from .risk_tool import analyze_risk
-from .investment_tool import optimize_investments
+from .investment_tool import optimize_investments, investment_frontier
 
-__all__ = ["get_assets", "analyze_risk", "optimize_investments"]
\ No newline at end of file
+__all__ = ["get_assets", "analyze_risk", "optimize_investments", "investment_frontier"]
\ No newline at end of file
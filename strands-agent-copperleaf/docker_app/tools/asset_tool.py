@@ -1,16 +1,11 @@
+import base64
 import requests
-from typing import Dict, Any, Optional
-from strands import tool
-from authorization import user_permissions
-
-from dataclasses import dataclass
-
-@dataclass
-class Asset:
-    id: str
-    name: str
-    portfolioId: str
-    value: int
+from typing import Dict, Any, List, Optional
+from strands import tool, ToolContext
+from asset_store import Asset, AssetStore
+from config_file import Config
+from tool_limits import limited
+from tool_memo import memoize
 
 assets = {
     "1": Asset(id="1", name="Building A", portfolioId="p1", value=1_200_000),
@@ -49,32 +44,103 @@ assets = {
     "25": Asset(id="25", name="Logistics Hub J", portfolioId="p10", value=3_900_000),
 }
 
-@tool
-def get_assets(portfolio_id: Optional[str] = None, asset_id: Optional[str] = None, user: str = "User 1") -> Dict[str, Any]:
-    """Get assets from portfolio, optionally filtered by portfolio ID or get specific asset by ID"""
+# Memory-map the configured register, or fall back to the demo assets above
+if Config.ASSET_REGISTER_PATH:
+    asset_store = AssetStore.load(Config.ASSET_REGISTER_PATH)
+else:
+    asset_store = AssetStore.from_assets(assets.values())
+
+ASSET_FIELDS = ["id", "name", "portfolioId", "value"]
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def _encode_cursor(query: str, offset: int) -> str:
+    # Bound to the query and the register version, so a stale cursor is rejected instead of skipping rows
+    raw = f"{asset_store.version}:{offset}:{query}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str, query: str) -> Optional[int]:
+    try:
+        version, offset, cursor_query = base64.urlsafe_b64decode(cursor.encode()).decode().split(":", 2)
+        if int(version) != asset_store.version or cursor_query != query or int(offset) < 0:
+            return None
+        return int(offset)
+    except ValueError:
+        return None
+
+
+def _project(asset: Asset, fields: List[str]) -> Dict[str, Any]:
+    return {field: getattr(asset, field) for field in fields}
+
+
+def _aggregate(policy, portfolio_id: Optional[str], fields: List[str], top_n: int, offset: int, limit: int) -> Dict[str, Any]:
+    """Totals over every visible portfolio, and a page of per-portfolio summaries"""
+    codes = asset_store.visible_codes(policy, portfolio_id)
+    offsets = asset_store.table.portfolio_offsets
+    count = int((offsets[codes + 1] - offsets[codes]).sum())
+    total_value = int(asset_store.portfolio_totals()[codes].sum())
+
+    portfolios = asset_store.summarize(codes[offset:offset + limit], top_n)
+    for summary in portfolios:
+        summary["meanValue"] = round(summary["totalValue"] / summary["count"], 2) if summary["count"] else 0
+        summary["topAssets"] = [_project(asset_store.table.asset(row), fields) for row in summary.pop("topRows")]
+    return {
+        "count": count,
+        "totalValue": total_value,
+        "meanValue": round(total_value / count, 2) if count else 0,
+        "portfolios": portfolios,
+    }, len(codes)
+
+
+@tool(context=True)
+@limited
+@memoize(lambda session_id: (asset_store.version,))
+def get_assets(portfolio_id: Optional[str] = None, asset_id: Optional[str] = None, user: str = "User 1", fields: Optional[List[str]] = None, limit: int = PAGE_SIZE, cursor: Optional[str] = None, aggregate: bool = False, top_n: int = 3, tool_context: ToolContext = None) -> Dict[str, Any]:
+    """Get assets from portfolio, optionally filtered by portfolio ID or get specific asset by ID. Prefer aggregate=True for overviews: it returns overall count, totalValue and meanValue plus, per portfolio, the count, totalValue, meanValue and the top_n assets by value instead of every asset. Assets (or portfolio summaries) are paginated: pass nextCursor from the previous result as cursor to read the next page of up to limit items. fields selects which of id, name, portfolioId, value to return"""
     
     # Check user permissions
-    permissions = user_permissions.get(user, [])
-    if "FULL_ASSETS_SERVICE" not in permissions and "RESTRICTED_ASSETS_SERVICE" not in permissions:
+    policy = asset_store.policy_for(user)
+    if not policy.asset_access:
         return {"success": False, "error": "Sorry, user does not have access to asset service"}
     
-    if "RESTRICTED_ASSETS_SERVICE" in permissions:
-        if portfolio_id and portfolio_id[1:].isdigit() and int(portfolio_id[1:]) % 2 != 0:
-            return {"success": False, "error": f"Sorry, user does not have access to data on portfolio {portfolio_id}"}
+    if portfolio_id and not policy.can_view(portfolio_id):
+        return {"success": False, "error": f"Sorry, user does not have access to data on portfolio {portfolio_id}"}
+    
+    fields = fields or ASSET_FIELDS
+    unknown = [f for f in fields if f not in ASSET_FIELDS]
+    if unknown:
+        return {"success": False, "error": f"Unknown fields {unknown}, available fields are {ASSET_FIELDS}"}
     
     if asset_id:
-        asset = assets.get(asset_id)
-        if asset:
-            return {"success": True, "data": {"id": asset.id, "name": asset.name, "portfolioId": asset.portfolioId, "value": asset.value}}
+        asset = asset_store.get(asset_id)
+        if asset and policy.can_view(asset.portfolioId):
+            return {"success": True, "data": _project(asset, fields)}
         else:
             return {"success": False, "error": "Asset not found"}
     
-    filtered_assets = []
-    for asset in assets.values():
-        if not portfolio_id or asset.portfolioId == portfolio_id:
-            # Filter out odd portfolios for restricted users
-            if "RESTRICTED_ASSETS_SERVICE" in permissions and asset.portfolioId[1:].isdigit() and int(asset.portfolioId[1:]) % 2 != 0:
-                continue
-            filtered_assets.append({"id": asset.id, "name": asset.name, "portfolioId": asset.portfolioId, "value": asset.value})
+    if top_n < 0:
+        return {"success": False, "error": "top_n must be 0 or more"}
+    
+    query = f"{'portfolios' if aggregate else 'assets'}/{portfolio_id or ''}"
+    offset = 0
+    if cursor:
+        offset = _decode_cursor(cursor, query)
+        if offset is None:
+            return {"success": False, "error": "Invalid or expired cursor, repeat the query without it"}
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
+    if aggregate:
+        data, total = _aggregate(policy, portfolio_id, fields, top_n, offset, limit)
+        returned = len(data["portfolios"])
+    else:
+        # Index lookup: only the rows of the requested page are read
+        rows, total = asset_store.page(policy, portfolio_id, offset, limit)
+        data = [_project(asset_store.table.asset(row), fields) for row in rows]
+        returned = len(rows)
     
-    return {"success": True, "data": filtered_assets}
\ No newline at end of file
+    result = {"success": True, "data": data, "total": total}
+    if offset + returned < total:
+        result["nextCursor"] = _encode_cursor(query, offset + returned)
+    return result
\ No newline at end of file
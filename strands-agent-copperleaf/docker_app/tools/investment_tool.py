@@ -1,9 +1,18 @@
 import requests
 import json
-from typing import List, Dict, Any
-from strands import tool
-from authorization import user_permissions
-from context_storage import get_risk_score
+import hashlib
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+import numpy as np
+from strands import tool, ToolContext
+from authorization import UserPolicy
+from context_storage import get_risk_scores, save_risk_scores, session_from, risk_version, SessionValues
+from config_file import Config
+from optimizer import solve_mckp, Frontier, FrontierCache, KnapsackSolution
+from risk_engine import score_risk
+from tool_limits import limited
+from tool_memo import memoize
+from .asset_tool import asset_store
 
 INTERVENTION_TYPES = {
     "Replace": {"cost_multiplier": 1.0, "risk_reduction": 0.40},
@@ -11,66 +20,223 @@ INTERVENTION_TYPES = {
     "Retain": {"cost_multiplier": 0.0, "risk_reduction": 0.0}
 }
 
-@tool
-def optimize_investments(candidates: List[Dict[str, Any]], budget: float, horizon_months: int = 24, user: str = "User 1") -> Dict[str, Any]:
-    """Optimize investment selection with one intervention type per asset. Each candidate must have: assetId, interventionType, cost, expectedRiskReduction. Available intervention types: Replace (100% cost, 20% risk reduction), Preventive Maintenance (20% cost, 20% risk reduction), Retain (0% cost, 0% risk reduction)"""
-    
+CANDIDATE_KEYS = ["assetId", "interventionType", "cost", "expectedRiskReduction"]
+
+# Frontiers keyed by candidate set, and the latest frontier computed in each session
+frontier_cache = FrontierCache()
+latest_frontier = SessionValues(Config.RISK_CONTEXT_TTL_SECONDS)
+
+
+@dataclass
+class CandidateSet:
+    """Intervention candidates as arrays: one knapsack group per asset, one item per candidate"""
+    asset_ids: List[str]
+    groups: np.ndarray
+    types: List[str]
+    costs: np.ndarray
+    risk_reductions: np.ndarray
+    generated: bool = False
+
+    @classmethod
+    def from_candidates(cls, candidates: List[Dict[str, Any]]) -> "CandidateSet":
+        # Canonical order, so the same candidates in any order share a cache key
+        candidates = sorted(candidates, key=lambda c: (str(c["assetId"]), str(c["interventionType"])))
+        asset_index = {}
+        groups = np.array([asset_index.setdefault(c["assetId"], len(asset_index)) for c in candidates], dtype=np.int64)
+        return cls(
+            asset_ids=list(asset_index),
+            groups=groups,
+            types=[c["interventionType"] for c in candidates],
+            costs=np.array([c["cost"] for c in candidates], dtype=np.float64),
+            risk_reductions=np.array([c["expectedRiskReduction"] for c in candidates], dtype=np.float64),
+        )
+
+    @classmethod
+    def from_assets(cls, asset_ids: List[str], values: np.ndarray) -> "CandidateSet":
+        """Every asset x every intervention type, priced from the asset value"""
+        types = list(INTERVENTION_TYPES)
+        multipliers = np.array([INTERVENTION_TYPES[t]["cost_multiplier"] for t in types])
+        reductions = np.array([INTERVENTION_TYPES[t]["risk_reduction"] for t in types])
+        return cls(
+            asset_ids=list(asset_ids),
+            groups=np.repeat(np.arange(len(asset_ids), dtype=np.int64), len(types)),
+            types=types * len(asset_ids),
+            costs=np.outer(np.asarray(values, dtype=np.float64), multipliers).ravel(),
+            risk_reductions=np.tile(reductions, len(asset_ids)),
+            generated=True,
+        )
+
+    def key(self, initial_risk: np.ndarray) -> str:
+        """Key of the candidate set and the risk scores it was valued with"""
+        digest = hashlib.sha1()
+        digest.update("\x1f".join(self.asset_ids).encode())
+        digest.update("\x1f".join(self.types).encode())
+        for array in (self.groups, self.costs, self.risk_reductions, initial_risk):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()[:16]
+
+
+def _validate(candidates: List[Dict[str, Any]]) -> Optional[str]:
+    for candidate in candidates:
+        if not all(key in candidate for key in CANDIDATE_KEYS):
+            return "Each candidate must have assetId, interventionType, cost, and expectedRiskReduction"
+    return None
+
+
+def _generate(policy: UserPolicy, portfolio_id: Optional[str], asset_ids: Optional[List[str]]):
+    """Build candidates server-side from the asset register. Returns (CandidateSet, error)"""
+    if not policy.asset_access:
+        return None, "Sorry, user does not have access to asset service"
+    if portfolio_id:
+        if not policy.can_view(portfolio_id):
+            return None, f"Sorry, user does not have access to data on portfolio {portfolio_id}"
+        rows = np.array(asset_store.table.portfolio_rows(portfolio_id), dtype=np.int64)
+    else:
+        rows = asset_store.table.find_many(asset_ids)
+        rows = rows[rows >= 0]
+        rows = rows[asset_store.visible_mask(policy, rows)]
+    ids = [asset_store.table.ids[row].decode("utf-8") for row in rows]
+    return CandidateSet.from_assets(ids, asset_store.table.values[rows]), None
+
+
+def _initial_risk(candidate_set: CandidateSet, session_id: str, horizon_months: int) -> np.ndarray:
+    """Current risk of every candidate's asset, read from this session's context in one batch.
+
+    For server-generated candidates, assets never analyzed in this session are
+    scored (and saved) here instead of falling back to the default risk.
+    """
+    if not candidate_set.generated:
+        risks = get_risk_scores(candidate_set.asset_ids, session_id, horizon_months)
+    else:
+        risks = get_risk_scores(candidate_set.asset_ids, session_id, horizon_months, default=None)
+        missing = [a for a in candidate_set.asset_ids if a not in risks]
+        if missing:
+            rows = asset_store.table.find_many(missing)
+            scores = score_risk(asset_store.table.values[rows], missing, horizon_months)
+            scored = {a: round(float(s), 3) for a, s in zip(missing, scores)}
+            save_risk_scores(scored, session_id, horizon_months)
+            risks.update(scored)
+    per_asset = np.array([risks[a] for a in candidate_set.asset_ids])
+    return per_asset[candidate_set.groups] if len(per_asset) else np.empty(0)
+
+
+def _score_unanalyzed(arguments: Dict[str, Any], session_id: str):
+    """Score (and save) the assets of server-generated candidates before the memo key is taken,
+    so saving them does not change the risk version under the call"""
+    if arguments.get("candidates") or not (arguments.get("portfolio_id") or arguments.get("asset_ids")):
+        return
+    policy = asset_store.policy_for(arguments["user"])
+    if not policy.allows("FULL_OPTIMIZATION_SERVICE"):
+        return
+    candidate_set, error = _generate(policy, arguments.get("portfolio_id"), arguments.get("asset_ids"))
+    if not error:
+        _initial_risk(candidate_set, session_id, arguments["horizon_months"])
+
+
+def _format(solution: KnapsackSolution, candidate_set: CandidateSet, initial_risk: np.ndarray) -> Dict[str, Any]:
+    selected = []
+    for i in solution.selected:
+        reduction = float(candidate_set.risk_reductions[i])
+        selected.append({
+            "assetId": candidate_set.asset_ids[candidate_set.groups[i]],
+            "interventionType": candidate_set.types[i],
+            "cost": float(candidate_set.costs[i]),
+            "expectedRiskReduction": reduction,
+            "initialRisk": float(initial_risk[i]),
+            "finalRisk": float(initial_risk[i] * (1 - reduction))
+        })
+
+    return {
+        "selectedInvestments": selected,
+        "totalCost": solution.total_cost,
+        "totalRiskReduction": round(solution.total_value, 6),
+        "optimalityGap": round(solution.gap, 6)
+    }
+
+
+def _resolve(policy, candidates, portfolio_id, asset_ids, session_id, horizon_months):
+    """Candidate set and initial risks from explicit candidates or the register. Returns (set, risks, error)"""
+    if candidates:
+        error = _validate(candidates)
+        if error:
+            return None, None, error
+        candidate_set = CandidateSet.from_candidates(candidates)
+    elif portfolio_id or asset_ids:
+        candidate_set, error = _generate(policy, portfolio_id, asset_ids)
+        if error:
+            return None, None, error
+    else:
+        return None, None, "Provide a portfolio_id, asset_ids or candidates"
+    return candidate_set, _initial_risk(candidate_set, session_id, horizon_months), None
+
+
+def preview_budget(session_id: str, budget: float) -> Optional[Dict[str, Any]]:
+    """Look up what a budget buys on the session's latest frontier, without a new solve"""
+    entry = frontier_cache.get(latest_frontier.get(session_id, ""))
+    if entry is None or not entry[0].covers(budget):
+        return None
+    frontier, (candidate_set, initial_risk) = entry
+    return _format(frontier.select(budget), candidate_set, initial_risk)
+
+
+@tool(context=True)
+@limited
+@memoize(lambda session_id: (asset_store.version, risk_version(session_id)), prepare=_score_unanalyzed)
+def optimize_investments(budget: float, portfolio_id: Optional[str] = None, asset_ids: Optional[List[str]] = None, candidates: Optional[List[Dict[str, Any]]] = None, horizon_months: int = 24, user: str = "User 1", tool_context: ToolContext = None) -> Dict[str, Any]:
+    """Optimize investment selection with one intervention type per asset, maximizing total risk reduction within budget. Pass a portfolio_id (or asset_ids): candidates for every asset and intervention type are generated server-side. Available intervention types: Replace (100% cost, 40% risk reduction), Preventive Maintenance (20% cost, 20% risk reduction), Retain (0% cost, 0% risk reduction). Only pass candidates (each with assetId, interventionType, cost, expectedRiskReduction) to evaluate custom interventions"""
+
     # Check user permissions
     # In production, this would likely involve checking a database or an external service
     # In AWS/Azure, this can be done via IAM roles/groups with respective policies for RBAC
     # Here we use a simple dictionary for demonstration
     # For example, using the logged user's session token/API key we can fetch permissions
     # Alternatively, instead of checking for permissions here, we pass that bearer token to the API call
-    permissions = user_permissions.get(user, [])
-    if "FULL_OPTIMIZATION_SERVICE" not in permissions:
+    policy = asset_store.policy_for(user)
+    if not policy.allows("FULL_OPTIMIZATION_SERVICE"):
         return {"success": False, "error": "Sorry, user does not have access to investment optimization service"}
-    
-    # Validate candidates
-    for candidate in candidates:
-        if not all(key in candidate for key in ["assetId", "interventionType", "cost", "expectedRiskReduction"]):
-            return {"success": False, "error": "Each candidate must have assetId, interventionType, cost, and expectedRiskReduction"}
-    
-    # Group candidates by asset and select best intervention per asset
-    asset_groups = {}
-    for candidate in candidates:
-        asset_id = candidate["assetId"]
-        if asset_id not in asset_groups:
-            asset_groups[asset_id] = []
-        asset_groups[asset_id].append(candidate)
-    
-    # Select best intervention per asset (highest risk reduction)
-    best_per_asset = []
-    for asset_id, asset_candidates in asset_groups.items():
-        best = max(asset_candidates, key=lambda x: x["expectedRiskReduction"])
-        best_per_asset.append(best)
-    
-    # Sort by highest risk reduction and select within budget
-    sorted_candidates = sorted(best_per_asset, key=lambda x: x["expectedRiskReduction"], reverse=True)
-    
-    selected = []
-    total_cost = 0
-    
-    for candidate in sorted_candidates:
-        if total_cost + candidate["cost"] <= budget:
-            # Get actual current risk for the asset from context
-            initial_risk = get_risk_score(candidate["assetId"])
-            final_risk = initial_risk * (1 - candidate["expectedRiskReduction"])
-            
-            selected_investment = {
-                "assetId": candidate["assetId"],
-                "interventionType": candidate["interventionType"],
-                "cost": candidate["cost"],
-                "expectedRiskReduction": candidate["expectedRiskReduction"],
-                "initialRisk": initial_risk,
-                "finalRisk": final_risk
-            }
-            selected.append(selected_investment)
-            total_cost += candidate["cost"]
-    
-    return {
-        "success": True,
-        "data": {
-            "selectedInvestments": selected,
-            "totalCost": total_cost
-        }
-    }
\ No newline at end of file
+
+    candidate_set, initial_risk, error = _resolve(policy, candidates, portfolio_id, asset_ids,
+                                                  session_from(tool_context), horizon_months)
+    if error:
+        return {"success": False, "error": error}
+
+    # A cached frontier for the same candidates answers any budget it covers by lookup.
+    # On a rounded budget grid the lookup may be worse than a direct solve, so both are tried.
+    solution = None
+    entry = frontier_cache.get(candidate_set.key(initial_risk))
+    if entry is not None and entry[0].covers(budget):
+        solution = entry[0].select(budget)
+    if solution is None or not solution.exact:
+        values = initial_risk * candidate_set.risk_reductions
+        direct = solve_mckp(candidate_set.groups, candidate_set.costs, values, budget)
+        if solution is None or direct.total_value >= solution.total_value:
+            solution = direct
+
+    return {"success": True, "data": _format(solution, candidate_set, initial_risk)}
+
+
+@tool(context=True)
+@limited
+def investment_frontier(max_budget: float, portfolio_id: Optional[str] = None, asset_ids: Optional[List[str]] = None, candidates: Optional[List[Dict[str, Any]]] = None, points: int = 11, horizon_months: int = 24, user: str = "User 1", tool_context: ToolContext = None) -> Dict[str, Any]:
+    """Compute the risk reduction achievable at every budget from 0 to max_budget in one pass. Returns a compact curve of (budget, totalRiskReduction, upperBound) points. Afterwards, optimize_investments for the same portfolio_id, asset_ids or candidates and any budget up to max_budget is answered instantly when the curve is exact"""
+
+    policy = asset_store.policy_for(user)
+    if not policy.allows("FULL_OPTIMIZATION_SERVICE"):
+        return {"success": False, "error": "Sorry, user does not have access to investment optimization service"}
+
+    session_id = session_from(tool_context)
+    candidate_set, initial_risk, error = _resolve(policy, candidates, portfolio_id, asset_ids, session_id, horizon_months)
+    if error:
+        return {"success": False, "error": error}
+    key = candidate_set.key(initial_risk)
+
+    entry = frontier_cache.get(key)
+    if entry is not None and entry[0].covers(max_budget):
+        frontier = entry[0]
+    else:
+        values = initial_risk * candidate_set.risk_reductions
+        frontier = Frontier(candidate_set.groups, candidate_set.costs, values, max_budget)
+        frontier_cache.put(key, frontier, (candidate_set, initial_risk))
+    latest_frontier.set(session_id, key)
+
+    return {"success": True, "data": {"frontierId": key, "curve": frontier.curve(points, max_budget)}}
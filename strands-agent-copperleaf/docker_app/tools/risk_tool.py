@@ -1,13 +1,26 @@
-import random
 from typing import List, Dict, Any
-from strands import tool
-from .asset_tool import assets
-from authorization import user_permissions
-from context_storage import save_risk_scores
+from strands import tool, ToolContext
+from .asset_tool import asset_store
+from context_storage import save_risk_scores, session_from
+from risk_engine import score_risk, simulate_risk, DEFAULT_SAMPLES, MIN_SAMPLES
+from tool_limits import limited
+from tool_memo import memoize
 
-@tool
-def analyze_risk(asset_ids: List[str], horizon_months: int = 12, user: str = "User 1") -> Dict[str, Any]:
-    """Analyze risk for given asset IDs with specified time horizon"""
+# Interactive simulations reduce their sample count to answer within this budget
+INTERACTIVE_LATENCY_MS = 2000
+
+def _restore_scores(result, arguments, session_id):
+    """A memoized analysis still leaves its scores in the session context"""
+    if result.get("success"):
+        scores = {item["assetId"]: item["riskScore"] for item in result["data"]["riskAnalysis"]}
+        save_risk_scores(scores, session_id, arguments["horizon_months"])
+
+
+@tool(context=True)
+@limited
+@memoize(lambda session_id: (asset_store.version,), on_hit=_restore_scores)
+def analyze_risk(asset_ids: List[str], horizon_months: int = 12, user: str = "User 1", simulate: bool = False, samples: int = DEFAULT_SAMPLES, latency_budget_ms: int = INTERACTIVE_LATENCY_MS, tool_context: ToolContext = None) -> Dict[str, Any]:
+    """Analyze risk for given asset IDs with specified time horizon. Set simulate=True for a Monte Carlo estimate of the failure probability within the horizon, with 95% confidence intervals (riskLower, riskUpper); samples and latency_budget_ms control its size"""
     
     # Check user permissions
     # In production, this would likely involve checking a database or an external service
@@ -15,29 +28,35 @@ def analyze_risk(asset_ids: List[str], horizon_months: int = 12, user: str = "Us
     # Here we use a simple dictionary for demonstration
     # For example, using the logged user's session token/API key we can fetch permissions
     # Alternatively, instead of checking for permissions here, we pass that bearer token to the API call
-    permissions = user_permissions.get(user, [])
-    if "FULL_RISK_SERVICE" not in permissions:
+    policy = asset_store.policy_for(user)
+    if not policy.allows("FULL_RISK_SERVICE"):
         return {"success": False, "error": "Sorry, user does not have access to risk analysis service"}
     
-    risk_analysis = []
-    for asset_id in asset_ids:
-        asset = assets.get(asset_id)
-        if asset:
-            if asset.value < 500000:
-                risk_score = random.uniform(0, 0.3)
-            elif asset.value > 1000000:
-                risk_score = random.uniform(0.5, 1.0)
-            else:
-                risk_score = random.uniform(0.3, 0.5)
-            
-            risk_analysis.append({
-                "assetId": asset_id,
-                "riskScore": round(risk_score, 3),
-                "horizonMonths": horizon_months
-            })
+    rows = asset_store.table.find_many(asset_ids)
+    found = [asset_id for asset_id, row in zip(asset_ids, rows) if row >= 0]
+    values = asset_store.table.values[rows[rows >= 0]]
+    
+    if simulate:
+        if samples < MIN_SAMPLES:
+            return {"success": False, "error": f"samples must be at least {MIN_SAMPLES}"}
+        if latency_budget_ms <= 0:
+            return {"success": False, "error": "latency_budget_ms must be positive"}
+        simulation = simulate_risk(values, found, horizon_months, samples, latency_budget_ms)
+        risk_analysis = [
+            {"assetId": asset_id, "riskScore": round(float(score), 3), "horizonMonths": horizon_months,
+             "riskLower": round(float(lower), 3), "riskUpper": round(float(upper), 3), "samples": simulation["samples"]}
+            for asset_id, score, lower, upper in zip(found, simulation["riskScore"], simulation["riskLower"], simulation["riskUpper"])
+        ]
+    else:
+        # Score every known asset in one batch; scores are stable per (asset, horizon)
+        scores = score_risk(values, found, horizon_months)
+        risk_analysis = [
+            {"assetId": asset_id, "riskScore": round(float(score), 3), "horizonMonths": horizon_months}
+            for asset_id, score in zip(found, scores)
+        ]
     
-    # Save risk scores to context
+    # Save risk scores to this session's context for the horizon analyzed
     risk_scores = {item["assetId"]: item["riskScore"] for item in risk_analysis}
-    save_risk_scores(risk_scores)
+    save_risk_scores(risk_scores, session_from(tool_context), horizon_months)
     
     return {"success": True, "data": {"riskAnalysis": risk_analysis}}
\ No newline at end of file
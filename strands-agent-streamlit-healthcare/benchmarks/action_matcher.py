@@ -0,0 +1,88 @@
+"""Check the local action matcher against known phrasings of the sample scenarios.
+
+Usage:
+    python benchmarks/action_matcher.py
+
+Each answer is matched against its scenario file in docker_app/scenarios.
+An expected action of None means the answer must go to the nurse evaluator
+agent; in particular, no answer may be scored as a red flag locally, since
+harmless phrasings ("treat pain complaints") sit close to red flags ("ignore
+pain complaints"), and no delayed, negated or qualified phrasing ("check
+vital signs later") may be credited as the action. Prints the local hit rate and exits with status 1 if any
+answer is matched differently.
+"""
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docker_app")
+sys.path.insert(0, APP_DIR)
+
+from action_matcher import match_action, stats  # noqa: E402
+from models.scenario_catalog import parse_scenario  # noqa: E402
+
+POST_OP = "01_post_operative_care"
+TRIAGE = "02_emergency_room_triage"
+
+# (scenario, answer, expected action or None)
+CASES = [
+    (POST_OP, "I would check the patient's vital signs", "Check vital signs"),
+    (POST_OP, "I would check vital signs", "Check vital signs"),
+    (POST_OP, "Review the medication orders", "Review medication orders"),
+    (POST_OP, "assess their level of consciousness", "Assess level of consciousness"),
+    (POST_OP, "check blood pressure and heart rate", None),
+    (POST_OP, "check vital signs and review orders", None),
+    (POST_OP, "I would not check vital signs", None),
+    # Harmless answers close to a red flag
+    (POST_OP, "Treat pain complaints", None),
+    (POST_OP, "Listen to pain complaints", None),
+    (POST_OP, "I would address pain complaints", None),
+    (POST_OP, "I would administer medication per the orders", None),
+    (POST_OP, "I'd look at the medication orders", None),
+    (POST_OP, "Monitor vital signs assessment", None),
+    # Red flags themselves
+    (POST_OP, "ignore the pain complaints", None),
+    (POST_OP, "I would skip the vital signs", None),
+    (POST_OP, "leave the patient unattended", None),
+    # Delays, negations and additions to a necessary action
+    (POST_OP, "delay the vital signs check", None),
+    (POST_OP, "Leave to check vital signs", None),
+    (POST_OP, "assess level of consciousness by ignoring pain", None),
+    (POST_OP, "check vital signs and leave the patient unattended immediately", None),
+    (TRIAGE, "Check vital signs immediately", "Check vital signs immediately"),
+    (TRIAGE, "call for emergency assistance", "Call for emergency assistance"),
+    (TRIAGE, "prepare an ECG", "Prepare for ECG"),
+    (TRIAGE, "keep the patient calm and seated", "Keep patient calm and seated"),
+    (TRIAGE, "tell the patient to wait in the waiting room", None),
+    (TRIAGE, "skip checking vital signs", None),
+    (TRIAGE, "check vital signs later", None),
+    (TRIAGE, "check vital signs tomorrow", None),
+    (TRIAGE, "check vital signs eventually", None),
+    (TRIAGE, "check vital signs", None),
+    (TRIAGE, "Keep patient calm and seated alone", None),
+    (TRIAGE, "call for emergency assistance later", None),
+    (TRIAGE, "prepare for ECG tomorrow", None),
+    (TRIAGE, "keep the patient calm and seated in the room", None),
+    (TRIAGE, "it's just anxiety", None),
+]
+
+
+def main() -> int:
+    scenarios = {}
+    failures = 0
+    for scenario_id, answer, expected in CASES:
+        if scenario_id not in scenarios:
+            path = os.path.join(APP_DIR, "scenarios", f"{scenario_id}.yaml")
+            scenarios[scenario_id] = parse_scenario(path, os.stat(path).st_mtime_ns)
+        scenario = scenarios[scenario_id]
+        match = match_action(answer, scenario.necessary_actions, scenario.red_flags)
+        got = match.action if match else None
+        ok = got == expected and got not in scenario.red_flags
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {answer!r} -> {got or 'agent'}" + ("" if ok else f" (expected {expected or 'agent'})"))
+    snapshot = stats.snapshot()
+    print(f"\n{failures} of {len(CASES)} failed; {snapshot['hits']} scored locally ({snapshot['meanMs']:.2f} ms per match)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+# Matches a candidate's answer to a scenario action locally, so clear answers
+# ("I'd check their vital signs") are scored without a model call. Actions are
+# indexed as TF-IDF vectors of character n-grams; an answer is matched when
+# its cosine similarity to one action is high and clearly above the others,
+# it mentions every word of that action (so a shared "check" is not enough,
+# nor is "check vital signs" for "check vital signs immediately") and nothing
+# beyond it ("check vital signs tomorrow"). Only necessary actions are scored
+# locally: red flags differ from harmless answers by a word or two ("ignore"
+# vs "treat pain complaints"), so answers close to a red flag or using one of
+# its words, negations, delays and several actions in one answer are left to
+# the nurse evaluator agent.
+import functools
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+NGRAM_SIZES = (3, 4, 5)
+MIN_SCORE = 0.45
+MIN_MARGIN = 0.15
+# A necessary action must lead every red flag by this much
+RED_FLAG_MARGIN = 0.35
+STOP_WORDS = {"a", "an", "the", "to", "for", "of", "in", "on", "as", "and", "without", "their", "his", "her"}
+# Answers with these words are ambiguous for a similarity match
+DEFER_WORDS = {"not", "don't", "dont", "never", "no", "without", "instead", "before", "after", "unless",
+               "if", "or", "but", "should", "shouldn't", "wouldn't", "?", "skip", "skipping", "delay", "delaying",
+               "later", "tomorrow", "eventually", "ignore", "ignoring", "leave", "leaving", "alone", "wait", "waiting"}
+# Words an answer may add to an action without changing it
+NEUTRAL_WORDS = {"i", "i'd", "would", "patient", "patient's", "now"}
+# Answers are split into clauses here, to spot several actions in one answer
+CLAUSE_BREAK = re.compile(r"\b(?:and|then|also)\b")
+FILLER = re.compile(r"^(?:i(?: would|'d| will|'ll)?|first,?|then,?|next,?|now,?|let me|i want to|i'm going to|going to)\s+",
+                    re.I)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text: str) -> str:
+    text = " ".join(re.findall(r"[a-z0-9']+|\?", text.lower()))
+    while True:
+        stripped = FILLER.sub("", text)
+        if stripped == text:
+            return text
+        text = stripped
+
+
+def ngrams(text: str) -> List[str]:
+    """Character n-grams within each word, padded with spaces"""
+    grams = []
+    for word in text.split():
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            grams.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams
+
+
+def stems(text: str) -> set:
+    """Content words, cut to five characters so "vitals" meets "vital" and "assessment" meets "assess" """
+    return {w[:5] for w in normalize(text).split() if w not in STOP_WORDS}
+
+
+NEUTRAL_STEMS = {w[:5] for w in NEUTRAL_WORDS}
+
+
+@dataclass
+class ActionMatch:
+    action: str
+    score: float
+    margin: float
+
+
+class ActionIndex:
+    """TF-IDF character n-gram vectors of a scenario's necessary and red flag actions"""
+
+    def __init__(self, necessary_actions: List[str], red_flags: List[str]):
+        self.actions = list(necessary_actions) + list(red_flags)
+        self.action_stems = [stems(a) for a in self.actions]
+        self.red_flag = np.array([False] * len(necessary_actions) + [True] * len(red_flags))
+        # Words only red flags use: an answer with one of them is for the agent
+        self.red_flag_stems = (set().union(*self.action_stems[len(necessary_actions):])
+                               - set().union(*self.action_stems[:len(necessary_actions)]) - NEUTRAL_STEMS)
+        documents = [ngrams(normalize(a)) for a in self.actions]
+        self.vocabulary: Dict[str, int] = {}
+        for grams in documents:
+            for gram in grams:
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+        counts = np.zeros((len(self.actions), len(self.vocabulary)))
+        for row, grams in enumerate(documents):
+            np.add.at(counts[row], [self.vocabulary[g] for g in grams], 1)
+        document_frequency = (counts > 0).sum(axis=0)
+        self.idf = np.log((1 + len(self.actions)) / (1 + document_frequency)) + 1
+        self.vectors = self._unit(counts * self.idf)
+
+    @staticmethod
+    def _unit(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def scores(self, text: str) -> np.ndarray:
+        counts = np.zeros(len(self.vocabulary))
+        columns = [self.vocabulary[g] for g in ngrams(normalize(text)) if g in self.vocabulary]
+        np.add.at(counts, columns, 1)
+        return self.vectors @ self._unit(counts * self.idf)
+
+    def match(self, text: str) -> Optional[ActionMatch]:
+        """The action the answer clearly refers to, or None when it should go to the agent"""
+        words = set(normalize(text).split())
+        answer = stems(text)
+        if not words or words & DEFER_WORDS or answer & self.red_flag_stems or len(self.actions) == 0:
+            return None
+        clauses = [c for c in CLAUSE_BREAK.split(normalize(text)) if c.strip()]
+        if len(clauses) > 1:
+            matched = {int(np.argmax(s)) for s in map(self.scores, clauses) if s.max() >= MIN_SCORE}
+            if len(matched) > 1:
+                return None
+        scores = self.scores(text)
+        order = np.argsort(-scores)
+        best = int(order[0])
+        margin = float(scores[best] - scores[order[1]]) if len(order) > 1 else float(scores[best])
+        if scores[best] < MIN_SCORE or margin < MIN_MARGIN:
+            return None
+        # Red flags, and answers that come near one, are always for the agent
+        if self.red_flag[best] or (scores[self.red_flag] > scores[best] - RED_FLAG_MARGIN).any():
+            return None
+        # Every word of the action, and no other content word
+        required = self.action_stems[best]
+        if not required <= answer or not answer - NEUTRAL_STEMS <= required:
+            return None
+        return ActionMatch(self.actions[best], float(scores[best]), margin)
+
+
+@functools.lru_cache(maxsize=256)
+def index_for(necessary_actions: Tuple[str, ...], red_flags: Tuple[str, ...]) -> ActionIndex:
+    return ActionIndex(list(necessary_actions), list(red_flags))
+
+
+class MatcherStats:
+    """Hit rate and match latency of the local matcher"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool, elapsed_ms: float):
+        with self._lock:
+            self.hits += hit
+            self.misses += not hit
+            self.total_ms += elapsed_ms
+            hits, total = self.hits, self.hits + self.misses
+        logger.info("Action matcher: %s in %.2f ms (hit rate %d/%d)", "hit" if hit else "deferred to agent",
+                    elapsed_ms, hits, total)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hitRate": self.hits / total if total else 0.0,
+                    "meanMs": self.total_ms / total if total else 0.0}
+
+
+stats = MatcherStats()
+
+
+def match_action(text: str, necessary_actions: List[str], red_flags: List[str]) -> Optional[ActionMatch]:
+    start = time.perf_counter()
+    match = index_for(tuple(necessary_actions), tuple(red_flags)).match(text)
+    stats.record(match is not None, (time.perf_counter() - start) * 1000)
+    return match
+
+
+def apply_match(session, user_action: str, match: ActionMatch, necessary_actions: List[str]) -> str:
+    """Record a matched necessary action in the assessment, as track_action would, and return the nurse's reply"""
+    already_done = match.action in session.correct_actions
+    session.add_completed_action(user_action)
+    session.add_correct_action(match.action)
+    if already_done:
+        return "You have already done that. What next?"
+    if len(session.correct_actions) >= len(necessary_actions):
+        return "That's a correct action. Assessment completed."
+    return "That's a correct action. What next?"
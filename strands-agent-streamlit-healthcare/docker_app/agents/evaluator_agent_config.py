@@ -5,14 +5,27 @@ Your role is to provide a short final assessment report based on:
 - The scenario presented
 - Actions completed by the candidate (compared to necessary actions)
 - Any red flag actions performed
-- All necessary actions completed successfully without red flags means 5 stars always
-- 1 red flag means a maximum of 3 stars
-- 2 or more red flags means a maximum of 2 stars
+- The performance rating, already computed from the actions and red flags and given in the request
 
 Provide a simple report that includes:
 1. Summary of completed actions
 2. Any red flags or concerns
-3. Overall performance rating (Between 1 to 5 stars)
+3. Overall performance rating: state the given rating and explain it, never change it
 
 Be concise, professional, and specific in your feedback.
 """
+
+
+def star_rating(correct_actions: int, necessary_actions: int, red_flags: int) -> int:
+    """Performance rating from 1 to 5 stars:
+    - All necessary actions completed successfully without red flags means 5 stars always
+    - 1 red flag means a maximum of 3 stars
+    - 2 or more red flags means a maximum of 2 stars
+    Incomplete assessments get stars in proportion to the necessary actions completed.
+    """
+    stars = 5 if correct_actions >= necessary_actions else max(1, round(5 * correct_actions / max(necessary_actions, 1)))
+    if red_flags >= 2:
+        return min(stars, 2)
+    if red_flags == 1:
+        return min(stars, 3)
+    return stars
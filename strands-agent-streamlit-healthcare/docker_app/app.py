@@ -1,9 +1,16 @@
+import uuid
 import streamlit as st
-from agents.nurse_agent_config import get_system_prompt
-from agents.evaluator_agent_config import get_evaluator_prompt
+from agents.evaluator_agent_config import star_rating
 from strands import Agent
-from strands.models import BedrockModel
-from tools.track_action import track_action, session
+from tools.track_action import track_action
+from models.session_registry import registry
+from models.scenario_catalog import catalog
+from instrumentation import Instrumentation
+from bedrock_client import bedrock_model
+from action_matcher import apply_match, match_action, stats as matcher_stats
+from final_report import ReportJob, stars
+from intro_cache import prewarm, present_scenario
+from config_file import Config
 
 # ============================================================================
 # SESSION STATE INITIALIZATION
@@ -14,6 +21,15 @@ if "scenario_started" not in st.session_state:
     st.session_state.scenario_started = False
 if "image_shown" not in st.session_state:
     st.session_state.image_shown = False
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "report_job" not in st.session_state:
+    st.session_state.report_job = None
+if "agents" not in st.session_state:
+    st.session_state.agents = {}
+
+# This candidate's assessment progress, shared with track_action through the agent state
+session = registry.get(st.session_state.session_id)
 
 # ============================================================================
 # PAGE HEADER
@@ -23,46 +39,6 @@ st.title("BC Registered Nurse Assessment")
 st.markdown("**Developed by Felipe Archangelo** | [💻 GitHub](https://github.com/fearchangelo) | [:briefcase: LinkedIn](https://linkedin.com/in/farchangelo)")
 st.write("This application assesses your readiness to become a registered nurse 🏥 in British Columbia 🇨🇦 .")
 
-# ============================================================================
-# SCENARIO DEFINITION
-# ============================================================================
-SCENARIOS = {
-    "Post-Operative Patient Care": {
-        "name": "Post-Operative Patient Care",
-        "description": "You are caring for a 65-year-old patient who just returned from surgery 2 hours ago. The patient is drowsy but responsive.",
-        "necessary_actions": [
-            "Check vital signs",
-            "Review medication orders",
-            "Assess level of consciousness"
-        ],
-        "red_flags": [
-            "Administer medication without checking orders",
-            "Skip vital signs assessment",
-            "Leave patient unattended immediately",
-            "Ignore pain complaints"
-        ],
-        "image": "img/scenario1.png"
-    },
-    "Emergency Room Triage": {
-        "name": "Emergency Room Triage",
-        "description": "A 45-year-old patient arrives at the ER complaining of severe chest pain radiating to the left arm. The patient is sweating profusely and appears anxious.",
-        "necessary_actions": [
-            "Check vital signs immediately",
-            "Assess pain level and location",
-            "Call for emergency assistance",
-            "Prepare for ECG",
-            "Keep patient calm and seated"
-        ],
-        "red_flags": [
-            "Tell patient to wait in waiting room",
-            "Dismiss symptoms as anxiety",
-            "Leave patient alone",
-            "Give medication without assessment"
-        ],
-        "image": "img/scenario2.png"
-    }
-}
-
 # ============================================================================
 # SIDEBAR CONFIGURATION
 # ============================================================================
@@ -73,28 +49,41 @@ with st.sidebar:
         ["anthropic.claude-3-5-haiku-20241022-v1:0", "us.amazon.nova-lite-v1:0"],
         index=0
     )
+    matched = matcher_stats.snapshot()
+    if matched["hits"]:
+        st.caption(f"Answers scored locally: {matched['hits']} of {matched['hits'] + matched['misses']} "
+                   f"({matched['meanMs']:.1f} ms per match)")
     
     st.header("Scenario")
-    selected_scenario_name = st.selectbox(
+    # Reloads changed scenario files at most every SCENARIO_RELOAD_SECONDS
+    scenarios = catalog.scenarios()
+    # Fills the introduction cache in the background, on the first run in this process
+    prewarm(scenarios.values(), Config.INTRO_PREWARM_MODELS)
+    selected_scenario_id = st.selectbox(
         "Select Scenario",
-        list(SCENARIOS.keys()),
+        list(scenarios.keys()),
+        format_func=lambda scenario_id: scenarios[scenario_id].name,
         index=0
     )
 
-SCENARIO = SCENARIOS[selected_scenario_name]
+SCENARIO = scenarios[selected_scenario_id]
 
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
-def generate_final_report_prompt():
+def current_rating():
+    return star_rating(len(session.correct_actions), len(SCENARIO.necessary_actions), len(session.red_flag_actions))
+
+def generate_final_report_prompt(rating):
     return f"""
-Scenario: {SCENARIO['name']}
-{SCENARIO['description']}
+Scenario: {SCENARIO.name}
+{SCENARIO.description}
 
-Necessary Actions: {', '.join(SCENARIO['necessary_actions'])}
+Necessary Actions: {', '.join(SCENARIO.necessary_actions)}
 Completed Actions: {', '.join(session.completed_actions)}
 Correct Actions: {', '.join(session.correct_actions)}
 Red Flag Actions: {', '.join(session.red_flag_actions) if session.red_flag_actions else 'None'}
+Performance Rating: {rating} out of 5 stars
 
 Provide a final assessment report.
 """
@@ -102,28 +91,22 @@ Provide a final assessment report.
 # ============================================================================
 # AGENT INITIALIZATION
 # ============================================================================
-model = BedrockModel(model_id=selected_model, max_tokens=4096)
-
-system_prompt = get_system_prompt(
-    SCENARIO["name"],
-    SCENARIO["description"],
-    SCENARIO["necessary_actions"],
-    SCENARIO["red_flags"]
-)
-
-agent = Agent(
-    name="Nurse Evaluator",
-    model=model,
-    system_prompt=system_prompt,
-    tools=[track_action],
-)
-
-evaluator_agent = Agent(
-    name="Senior Evaluator",
-    model=model,
-    system_prompt=get_evaluator_prompt(),
-    tools=[],
-)
+# Built once per model id, on the process-wide pooled Bedrock client
+model = bedrock_model(model_id=selected_model, max_tokens=4096)
+
+# One agent per scenario version and model in this session, kept across reruns with its conversation
+agent_key = (SCENARIO.version, selected_model)
+if agent_key not in st.session_state.agents:
+    st.session_state.agents[agent_key] = Agent(
+        name="Nurse Evaluator",
+        model=model,
+        system_prompt=SCENARIO.system_prompt,
+        tools=[track_action],
+        # track_action records actions in this session's assessment
+        state={"session_id": st.session_state.session_id},
+        hooks=[Instrumentation()],
+    )
+agent = st.session_state.agents[agent_key]
 
 # ============================================================================
 # START ASSESSMENT
@@ -132,17 +115,20 @@ if not st.session_state.scenario_started:
     if st.button("Start Assessment", use_container_width=True):
         st.session_state.scenario_started = True
         st.session_state.image_shown = True
-        session.start_scenario(SCENARIO["name"])
+        session.start_scenario(SCENARIO.name)
         
-        initial_response = agent("Present the scenario to the candidate and ask them what they would do first.")
-        st.session_state.messages.append({"role": "assistant", "content": str(initial_response)})
+        # Cached per scenario and model; the agent's conversation is seeded with the introduction
+        initial_response = present_scenario(agent, SCENARIO, selected_model)
+        st.session_state.messages.append({"role": "assistant", "content": initial_response})
         st.rerun()
 
 # ============================================================================
 # DISPLAY SCENARIO IMAGE
 # ============================================================================
 if st.session_state.scenario_started and st.session_state.image_shown:
-    st.image(SCENARIO["image"], use_container_width=True)
+    image = SCENARIO.image_bytes()
+    if image:
+        st.image(image, use_container_width=True)
     st.divider()
 
 # ============================================================================
@@ -152,6 +138,21 @@ for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.write(message["content"])
 
+# The final report streams in from a background thread; the page polls it until it is done
+@st.fragment(run_every=0.5)
+def show_final_report():
+    job = st.session_state.report_job
+    with st.chat_message("assistant"):
+        st.write(job.text or "Writing the final report...")
+    if job.done:
+        report = job.text if job.error is None else f"The final report could not be generated: {job.error}"
+        st.session_state.messages.append({"role": "assistant", "content": report})
+        st.session_state.report_job = None
+        st.rerun()
+
+if st.session_state.report_job is not None:
+    show_final_report()
+
 # ============================================================================
 # CHAT INPUT & EVALUATION
 # ============================================================================
@@ -162,20 +163,28 @@ if st.session_state.scenario_started:
         with st.chat_message("user"):
             st.write(user_input)
         
-        # Get agent evaluation
+        # Clear matches to a scenario action are scored locally; anything else goes to the agent
+        evaluation_prompt = f"The candidate said: '{user_input}'. Evaluate their response and guide them appropriately."
         with st.chat_message("assistant"):
-            with st.spinner("Evaluating..."):
-                agent_response = agent(f"The candidate said: '{user_input}'. Evaluate their response and guide them appropriately.")
-                response = str(agent_response)
-                st.write(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-                
-                # Check if assessment is complete
-                if len(session.correct_actions) >= len(SCENARIO["necessary_actions"]):
-                    evaluator_response = evaluator_agent(generate_final_report_prompt())
-                    st.write("\n---\n")
-                    st.write(str(evaluator_response))
-                    st.session_state.messages.append({"role": "assistant", "content": str(evaluator_response)})
+            match = match_action(user_input, SCENARIO.necessary_actions, SCENARIO.red_flags)
+            if match is not None:
+                response = apply_match(session, user_input, match, SCENARIO.necessary_actions)
+                # Keep the agent's conversation as if it had answered
+                agent.messages.append({"role": "user", "content": [{"text": evaluation_prompt}]})
+                agent.messages.append({"role": "assistant", "content": [{"text": response}]})
+            else:
+                with st.spinner("Evaluating..."):
+                    response = str(agent(evaluation_prompt))
+            st.write(response)
+            st.session_state.messages.append({"role": "assistant", "content": response})
+            
+            # Check if assessment is complete: the rating is shown now, the report follows
+            if len(session.correct_actions) >= len(SCENARIO.necessary_actions) and st.session_state.report_job is None:
+                rating = current_rating()
+                rating_message = f"---\n\n**Performance rating:** {stars(rating)} ({rating}/5)"
+                st.write(rating_message)
+                st.session_state.messages.append({"role": "assistant", "content": rating_message})
+                st.session_state.report_job = ReportJob(model, generate_final_report_prompt(rating)).start()
         
         st.rerun()
 
@@ -187,6 +196,8 @@ if st.session_state.scenario_started:
         st.session_state.messages = []
         st.session_state.scenario_started = False
         st.session_state.image_shown = False
+        st.session_state.report_job = None
+        st.session_state.agents = {}
         session.reset()
         st.rerun()
 
@@ -196,8 +207,8 @@ if st.session_state.scenario_started:
 if st.session_state.scenario_started:
     with st.sidebar:
         st.header("Progress")
-        st.write(f"**Completed Actions: ({len(session.correct_actions)}/{len(SCENARIO['necessary_actions'])})**")
-        for action in SCENARIO['necessary_actions']:
+        st.write(f"**Completed Actions: ({len(session.correct_actions)}/{len(SCENARIO.necessary_actions)})**")
+        for action in SCENARIO.necessary_actions:
             if action in session.correct_actions:
                 st.markdown(f"✅ {action}")
         
@@ -1,3 +1,5 @@
+import os
+
 class Config:
     # Stack name
     # Change this value if you want to create a new instance of the stack
@@ -18,3 +20,19 @@ class Config:
 
     # Enable authentication
     ENABLE_AUTH = False
+
+    # Assessment sessions (one per browser session) are evicted after this
+    # long without activity, or least recently used first above the memory cap
+    ASSESSMENT_SESSION_IDLE_SECONDS = int(os.environ.get("ASSESSMENT_SESSION_IDLE_SECONDS", 3600))
+    ASSESSMENT_SESSIONS_MAX_BYTES = int(os.environ.get("ASSESSMENT_SESSIONS_MAX_BYTES", 16 * 1024 * 1024))
+
+    # Scenario catalog: a directory of YAML/JSON files, checked for changes
+    # at most this often, so scenarios can be added without a restart
+    SCENARIOS_DIR = os.environ.get("SCENARIOS_DIR", "scenarios")
+    SCENARIO_RELOAD_SECONDS = float(os.environ.get("SCENARIO_RELOAD_SECONDS", 5))
+    SCENARIO_IMAGE_CACHE_SIZE = int(os.environ.get("SCENARIO_IMAGE_CACHE_SIZE", 32))
+
+    # Scenario introductions cached per (scenario, model, prompt version), and
+    # the model ids whose introductions are generated when the app starts
+    INTRO_CACHE_SIZE = int(os.environ.get("INTRO_CACHE_SIZE", 256))
+    INTRO_PREWARM_MODELS = [m for m in os.environ.get("INTRO_PREWARM_MODELS", "").split(",") if m]
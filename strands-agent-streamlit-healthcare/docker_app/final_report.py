@@ -0,0 +1,59 @@
+# Generates the senior evaluator's narrative report in a background thread,
+# so the star rating (computed locally) is shown as soon as the assessment
+# completes and the report streams in after it. The Streamlit page polls
+# the job's text while it is running.
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from strands import Agent
+
+from agents.evaluator_agent_config import get_evaluator_prompt
+from instrumentation import Instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+def stars(rating: int) -> str:
+    return "★" * rating + "☆" * (5 - rating)
+
+
+class ReportJob:
+    """One evaluator run; text grows as the model streams the report"""
+
+    def __init__(self, model, prompt: str):
+        self.prompt = prompt
+        self.text = ""
+        self.done = False
+        self.error: Optional[str] = None
+        self.started = time.perf_counter()
+        self.agent = Agent(
+            name="Senior Evaluator",
+            model=model,
+            system_prompt=get_evaluator_prompt(),
+            tools=[],
+            callback_handler=self._on_event,
+            hooks=[Instrumentation()],
+        )
+        self._thread = threading.Thread(target=self._run, name="final-report", daemon=True)
+
+    def start(self) -> "ReportJob":
+        self._thread.start()
+        return self
+
+    def _on_event(self, **kwargs: Any):
+        if "data" in kwargs:
+            self.text += kwargs["data"]
+
+    def _run(self):
+        try:
+            result = self.agent(self.prompt)
+            # The streamed text is the report; fall back to the result if nothing was streamed
+            self.text = self.text or str(result)
+        except Exception as e:
+            logger.exception("Final report failed")
+            self.error = str(e)
+        finally:
+            self.done = True
+            logger.info("Final report generated in %.1f s", time.perf_counter() - self.started)
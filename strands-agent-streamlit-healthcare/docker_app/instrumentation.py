@@ -0,0 +1,229 @@
+# Spans for agent invocations, model calls and tool calls.
+#
+# Every span is written to stdout as a CloudWatch Embedded Metric Format
+# (EMF) line, which the task's awslogs driver ships to CloudWatch Logs where
+# it becomes metrics, and is kept in a bounded in-process buffer for the
+# Streamlit "Instrumentation" page. Attach with Agent(hooks=[Instrumentation()]).
+#
+# This file is shared: keep it identical in every docker_app.
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from strands.hooks import (AfterInvocationEvent, AfterModelCallEvent, AfterToolCallEvent, BeforeInvocationEvent,
+                           BeforeModelCallEvent, BeforeToolCallEvent, HookProvider, HookRegistry)
+
+from config_file import Config
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "StrandsAgents")
+SERVICE = os.environ.get("METRICS_SERVICE", Config.STACK_NAME)
+EMIT_EMF = os.environ.get("METRICS_EMF", "1") != "0"
+MAX_SPANS = 5000
+
+METRIC_UNITS = {"Latency": "Milliseconds", "InputTokens": "Count", "OutputTokens": "Count",
+                "GuardrailInterventions": "Count", "Errors": "Count"}
+
+
+@dataclass
+class Span:
+    kind: str                  # "invocation", "model" or "tool"
+    name: str                  # agent, model id or tool name
+    agent: str
+    trace_id: str              # shared by the spans of one agent invocation
+    start: float               # epoch seconds
+    latency_ms: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    guardrail: bool = False
+    error: Optional[str] = None
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an ascending list"""
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+class SpanRecorder:
+    """Bounded buffer of recent spans, emitting each one as an EMF log line"""
+
+    def __init__(self, max_spans: int = MAX_SPANS, emit: bool = EMIT_EMF):
+        self.spans: "deque[Span]" = deque(maxlen=max_spans)
+        self.emit = emit
+        self._lock = threading.Lock()
+
+    def record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+            if self.emit:
+                sys.stdout.write(self.emf(span) + "\n")
+                sys.stdout.flush()
+
+    @staticmethod
+    def emf(span: Span) -> str:
+        metrics = {
+            "Latency": round(span.latency_ms, 3),
+            "InputTokens": span.input_tokens,
+            "OutputTokens": span.output_tokens,
+            "GuardrailInterventions": int(span.guardrail),
+            "Errors": int(span.error is not None),
+        }
+        return json.dumps({
+            "_aws": {
+                "Timestamp": int(span.start * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [["Service", "SpanKind"], ["Service", "SpanKind", "Name"]],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, unit in METRIC_UNITS.items()],
+                }],
+            },
+            "Service": SERVICE,
+            "SpanKind": span.kind,
+            "Name": span.name,
+            "Agent": span.agent,
+            "TraceId": span.trace_id,
+            "Error": span.error,
+            **metrics,
+        })
+
+    def snapshot(self) -> List[Span]:
+        with self._lock:
+            return list(self.spans)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Count, latency percentiles, tokens, guardrail interventions and errors per (kind, name)"""
+        groups: Dict[tuple, List[Span]] = {}
+        for span in self.snapshot():
+            groups.setdefault((span.kind, span.name), []).append(span)
+        rows = []
+        for (kind, name), spans in sorted(groups.items()):
+            latencies = sorted(s.latency_ms for s in spans)
+            rows.append({
+                "kind": kind,
+                "name": name,
+                "count": len(spans),
+                "p50Ms": round(_percentile(latencies, 50), 1),
+                "p95Ms": round(_percentile(latencies, 95), 1),
+                "totalMs": round(sum(latencies), 1),
+                "inputTokens": sum(s.input_tokens for s in spans),
+                "outputTokens": sum(s.output_tokens for s in spans),
+                "guardrailInterventions": sum(s.guardrail for s in spans),
+                "errors": sum(s.error is not None for s in spans),
+            })
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+recorder = SpanRecorder()
+
+
+def _usage(agent) -> tuple:
+    usage = agent.event_loop_metrics.accumulated_usage
+    return usage.get("inputTokens", 0), usage.get("outputTokens", 0)
+
+
+class Instrumentation(HookProvider):
+    """Records a span per agent invocation, model call and tool call"""
+
+    def __init__(self, span_recorder: SpanRecorder = None):
+        self.recorder = span_recorder or recorder
+        # In-flight spans: invocations and model calls by agent, tool calls by toolUseId
+        self._open: Dict[Any, tuple] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeInvocationEvent, self._before_invocation)
+        registry.add_callback(AfterInvocationEvent, self._after_invocation)
+        registry.add_callback(BeforeModelCallEvent, self._before_model)
+        registry.add_callback(AfterModelCallEvent, self._after_model)
+        registry.add_callback(BeforeToolCallEvent, self._before_tool)
+        registry.add_callback(AfterToolCallEvent, self._after_tool)
+
+    def _span(self, kind: str, name: str, agent, opened: tuple, **fields) -> Span:
+        start, perf_start, trace_id = opened[:3]
+        return Span(kind, name, agent.name, trace_id, start, (time.perf_counter() - perf_start) * 1000, **fields)
+
+    def _before_invocation(self, event: BeforeInvocationEvent):
+        trace_id = uuid.uuid4().hex[:16]
+        event.invocation_state["trace_id"] = trace_id
+        self._open[("invocation", id(event.agent))] = (time.time(), time.perf_counter(), trace_id, _usage(event.agent))
+
+    def _after_invocation(self, event: AfterInvocationEvent):
+        opened = self._open.pop(("invocation", id(event.agent)), None)
+        if opened is None:
+            return
+        input_tokens, output_tokens = _usage(event.agent)
+        stop_reason = getattr(event.result, "stop_reason", None)
+        self.recorder.record(self._span(
+            "invocation", event.agent.name, event.agent, opened,
+            input_tokens=input_tokens - opened[3][0], output_tokens=output_tokens - opened[3][1],
+            guardrail=stop_reason == "guardrail_intervened",
+            error=None if event.result is not None else "no result"))
+
+    def _before_model(self, event: BeforeModelCallEvent):
+        trace_id = event.invocation_state.get("trace_id", "")
+        self._open[("model", id(event.agent))] = (time.time(), time.perf_counter(), trace_id)
+
+    def _after_model(self, event: AfterModelCallEvent):
+        opened = self._open.pop(("model", id(event.agent)), None)
+        if opened is None:
+            return
+        stop_response = event.stop_response
+        # The call's usage is attached to the response message before this hook runs
+        usage = (stop_response.message.get("metadata") or {}).get("usage", {}) if stop_response else {}
+        model_id = (event.agent.model.get_config() or {}).get("model_id", type(event.agent.model).__name__)
+        self.recorder.record(self._span(
+            "model", str(model_id), event.agent, opened,
+            input_tokens=usage.get("inputTokens", 0), output_tokens=usage.get("outputTokens", 0),
+            guardrail=stop_response is not None and stop_response.stop_reason == "guardrail_intervened",
+            error=None if event.exception is None else type(event.exception).__name__))
+
+    def _before_tool(self, event: BeforeToolCallEvent):
+        trace_id = event.invocation_state.get("trace_id", "")
+        self._open[("tool", event.tool_use["toolUseId"])] = (time.time(), time.perf_counter(), trace_id)
+
+    def _after_tool(self, event: AfterToolCallEvent):
+        opened = self._open.pop(("tool", event.tool_use["toolUseId"]), None)
+        if opened is None:
+            return
+        failed = event.exception is not None or event.result.get("status") == "error"
+        self.recorder.record(self._span(
+            "tool", event.tool_use["name"], event.agent, opened,
+            error=(type(event.exception).__name__ if event.exception else "error") if failed else None))
+
+
+def render_summary():
+    """Streamlit page: per-span summary and the most recent spans of this process"""
+    import streamlit as st
+
+    st.title("Instrumentation")
+    st.caption(f"Spans recorded by this process (last {recorder.spans.maxlen}); "
+               f"each is also logged as CloudWatch EMF in namespace {NAMESPACE}.")
+    rows = recorder.summary()
+    if not rows:
+        st.info("No spans recorded yet. Ask the agent something first.")
+        return
+    st.subheader("Where the time goes")
+    st.dataframe(rows, use_container_width=True)
+    st.subheader("Recent spans")
+    st.dataframe([asdict(s) for s in reversed(recorder.snapshot()[-200:])], use_container_width=True)
+    from bedrock_client import connection_stats
+    connections = connection_stats()
+    if connections["requests"]:
+        st.subheader("Bedrock connections")
+        st.caption(f"{connections['requests']} requests over {connections['newConnections']} connections "
+                   f"(reuse ratio {connections['reuseRatio']:.0%}, {connections['retries']} retries, "
+                   f"pool of {connections['maxPoolConnections']})")
+    if st.button("Reset"):
+        recorder.clear()
+        st.rerun()
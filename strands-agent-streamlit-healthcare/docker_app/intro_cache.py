@@ -0,0 +1,134 @@
+# Scenario introductions are almost the same text for every candidate on a
+# scenario and model, so the first one generated is cached and later
+# candidates start instantly: the nurse agent's conversation is seeded with
+# the cached turn, as if the agent had just presented the scenario.
+# Entries are keyed by (scenario version, model id, prompt version), so a
+# changed scenario file or prompt gets a new introduction. The cache can be
+# filled in the background at startup for the models in INTRO_PREWARM_MODELS.
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Tuple
+
+from strands import Agent
+
+from bedrock_client import bedrock_model
+from config_file import Config
+from instrumentation import Instrumentation
+from models.scenario_catalog import Scenario
+
+INTRO_PROMPT = "Present the scenario to the candidate and ask them what they would do first."
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_version(scenario: Scenario) -> str:
+    """Short hash of everything the introduction is generated from"""
+    return hashlib.sha256(f"{scenario.system_prompt}\n{INTRO_PROMPT}".encode()).hexdigest()[:12]
+
+
+def intro_key(scenario: Scenario, model_id: str) -> Tuple[str, str, str]:
+    return scenario.version, model_id, prompt_version(scenario)
+
+
+class IntroCache:
+    """Bounded LRU of introductions; concurrent misses on one key generate it once"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._intros: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._key_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key):
+        with self._lock:
+            text = self._intros.get(key)
+            if text is not None:
+                self._intros.move_to_end(key)
+            return text
+
+    def _put(self, key, text: str):
+        with self._lock:
+            self._intros[key] = text
+            self._intros.move_to_end(key)
+            while len(self._intros) > self.max_entries:
+                self._intros.popitem(last=False)
+
+    def get_or_generate(self, key, generate: Callable[[], str]) -> Tuple[str, bool]:
+        """The cached introduction and True, or a newly generated one and False"""
+        text = self._get(key)
+        if text is None:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                # Another candidate may have generated it while this one waited
+                text = self._get(key)
+                if text is None:
+                    start = time.perf_counter()
+                    text = generate()
+                    self._put(key, text)
+                    logger.info("Introduction for %s on %s generated in %.1f s", key[0], key[1],
+                                time.perf_counter() - start)
+                    with self._lock:
+                        self.misses += 1
+                        self._key_locks.pop(key, None)
+                    return text, False
+        with self._lock:
+            self.hits += 1
+        return text, True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._intros), "hits": self.hits, "misses": self.misses}
+
+
+cache = IntroCache(Config.INTRO_CACHE_SIZE)
+
+
+def _generate(scenario: Scenario, model_id: str) -> str:
+    # No tools: the introduction records no actions, and has no candidate session to record them in
+    agent = Agent(
+        name="Nurse Evaluator",
+        model=bedrock_model(model_id=model_id, max_tokens=4096),
+        system_prompt=scenario.system_prompt,
+        tools=[],
+        callback_handler=None,
+        hooks=[Instrumentation()],
+    )
+    return str(agent(INTRO_PROMPT))
+
+
+def present_scenario(agent: Agent, scenario: Scenario, model_id: str) -> str:
+    """Introduce the scenario to the candidate, from the cache when possible, and seed the agent's conversation"""
+    text, cached = cache.get_or_generate(intro_key(scenario, model_id), lambda: _generate(scenario, model_id))
+    agent.messages.append({"role": "user", "content": [{"text": INTRO_PROMPT}]})
+    agent.messages.append({"role": "assistant", "content": [{"text": text}]})
+    return text
+
+
+_prewarm_lock = threading.Lock()
+_prewarmed = False
+
+
+def prewarm(scenarios: Iterable[Scenario], model_ids: Iterable[str]):
+    """Generate the introductions in a background thread, once per process"""
+    global _prewarmed
+    with _prewarm_lock:
+        if _prewarmed:
+            return
+        _prewarmed = True
+    pairs = [(s, m) for m in model_ids for s in scenarios]
+
+    def run():
+        for scenario, model_id in pairs[:Config.INTRO_CACHE_SIZE]:
+            try:
+                cache.get_or_generate(intro_key(scenario, model_id), lambda: _generate(scenario, model_id))
+            except Exception:
+                logger.exception("Introduction for %s on %s could not be generated", scenario.id, model_id)
+
+    if pairs:
+        threading.Thread(target=run, name="intro-prewarm", daemon=True).start()
@@ -1,7 +1,11 @@
+import sys
+import threading
 from typing import List, Dict, Any, Set
 
 class AssessmentSession:
     def __init__(self):
+        # Tool calls and the Streamlit script thread may update a session at the same time
+        self._lock = threading.Lock()
         self.completed_actions: List[str] = []
         self.correct_actions: Set[str] = set()
         self.red_flag_actions: List[str] = []
@@ -10,26 +14,45 @@ class AssessmentSession:
         self.scenario_name = ""
     
     def start_scenario(self, scenario_name: str):
-        self.scenario_name = scenario_name
-        self.scenario_active = True
-        self.completed_actions = []
-        self.correct_actions = set()
-        self.red_flag_actions = []
-        self.conversation_history = []
+        with self._lock:
+            self.scenario_name = scenario_name
+            self.scenario_active = True
+            self.completed_actions = []
+            self.correct_actions = set()
+            self.red_flag_actions = []
+            self.conversation_history = []
     
     def add_completed_action(self, action: str):
-        if action not in self.completed_actions:
-            self.completed_actions.append(action)
+        with self._lock:
+            if action not in self.completed_actions:
+                self.completed_actions.append(action)
     
     def add_correct_action(self, action: str):
-        self.correct_actions.add(action)
+        with self._lock:
+            self.correct_actions.add(action)
     
     def add_red_flag_action(self, action: str):
-        if action not in self.red_flag_actions:
-            self.red_flag_actions.append(action)
+        with self._lock:
+            if action not in self.red_flag_actions:
+                self.red_flag_actions.append(action)
     
     def add_conversation(self, role: str, message: str):
-        self.conversation_history.append({"role": role, "message": message})
+        with self._lock:
+            self.conversation_history.append({"role": role, "message": message})
+    
+    def size_bytes(self) -> int:
+        """Approximate memory held by the session"""
+        with self._lock:
+            texts = [*self.completed_actions, *self.correct_actions, *self.red_flag_actions,
+                     *(m["message"] for m in self.conversation_history)]
+        return sys.getsizeof(self) + 1024 + sum(sys.getsizeof(t) for t in texts)
     
     def reset(self):
-        self.__init__()
+        # Keeps the lock, so a tool call holding it does not race a new one
+        with self._lock:
+            self.completed_actions = []
+            self.correct_actions = set()
+            self.red_flag_actions = []
+            self.conversation_history = []
+            self.scenario_active = False
+            self.scenario_name = ""
@@ -0,0 +1,124 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import yaml
+
+from agents.nurse_agent_config import get_system_prompt
+from config_file import Config
+
+EXTENSIONS = (".yaml", ".yml", ".json")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Scenario:
+    """One scenario file; a new instance is loaded whenever the file changes"""
+    id: str
+    name: str
+    description: str
+    necessary_actions: List[str]
+    red_flags: List[str]
+    image: str = ""
+    mtime_ns: int = 0
+
+    @property
+    def version(self) -> str:
+        # Nanoseconds, so two saves within one second are two versions
+        return f"{self.id}@{self.mtime_ns}"
+
+    @functools.cached_property
+    def system_prompt(self) -> str:
+        """Nurse evaluator system prompt, rendered once per scenario version"""
+        return get_system_prompt(self.name, self.description, self.necessary_actions, self.red_flags)
+
+    def image_bytes(self) -> Optional[bytes]:
+        """The scenario image, read on first display"""
+        return load_image(self.image) if self.image else None
+
+
+@functools.lru_cache(maxsize=Config.SCENARIO_IMAGE_CACHE_SIZE)
+def _read_image(path: str, mtime_ns: int) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_image(path: str) -> Optional[bytes]:
+    try:
+        return _read_image(path, os.stat(path).st_mtime_ns)
+    except OSError:
+        logger.warning("Scenario image %s not found", path)
+        return None
+
+
+def parse_scenario(path: str, mtime_ns: int) -> Scenario:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f) if path.endswith(".json") else yaml.safe_load(f)
+    return Scenario(
+        id=os.path.splitext(os.path.basename(path))[0],
+        name=data["name"],
+        description=data["description"],
+        necessary_actions=list(data["necessary_actions"]),
+        red_flags=list(data.get("red_flags", [])),
+        image=data.get("image", ""),
+        mtime_ns=mtime_ns,
+    )
+
+
+class ScenarioCatalog:
+    """Scenarios loaded from a directory of YAML/JSON files, reloading only files whose mtime changed"""
+
+    def __init__(self, directory: str, reload_seconds: float):
+        self.directory = directory
+        self.reload_seconds = reload_seconds
+        self._scenarios: Dict[str, Scenario] = {}
+        # Files that failed to parse, by mtime, so each version is reported once
+        self._failed: Dict[str, int] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._scenarios and now - self._checked < self.reload_seconds:
+                return
+            self._checked = now
+            seen = set()
+            with os.scandir(self.directory) as entries:
+                files = sorted((e for e in entries if e.is_file() and e.name.endswith(EXTENSIONS)), key=lambda e: e.name)
+            for entry in files:
+                scenario_id = os.path.splitext(entry.name)[0]
+                seen.add(scenario_id)
+                mtime_ns = entry.stat().st_mtime_ns
+                current = self._scenarios.get(scenario_id)
+                if (current is not None and current.mtime_ns == mtime_ns) or self._failed.get(scenario_id) == mtime_ns:
+                    continue
+                try:
+                    self._scenarios[scenario_id] = parse_scenario(entry.path, mtime_ns)
+                    self._failed.pop(scenario_id, None)
+                    logger.info("Scenario %s %s", scenario_id, "reloaded" if current else "loaded")
+                except (OSError, ValueError, KeyError, TypeError, yaml.YAMLError) as e:
+                    # Keep serving the previous version of a file that fails to parse
+                    self._failed[scenario_id] = mtime_ns
+                    logger.warning("Scenario file %s could not be loaded: %s", entry.path, e)
+            for scenario_id in set(self._scenarios) - seen:
+                del self._scenarios[scenario_id]
+                logger.info("Scenario %s removed", scenario_id)
+            # Keep the order of the file names
+            order = [os.path.splitext(e.name)[0] for e in files]
+            self._scenarios = {i: self._scenarios[i] for i in order if i in self._scenarios}
+
+    def scenarios(self) -> Dict[str, Scenario]:
+        """Scenarios by id, in file name order"""
+        self.refresh()
+        with self._lock:
+            return dict(self._scenarios)
+
+
+catalog = ScenarioCatalog(Config.SCENARIOS_DIR, Config.SCENARIO_RELOAD_SECONDS)
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config_file import Config
+from models.assessment_session import AssessmentSession
+
+DEFAULT_SESSION = "default"
+
+
+class SessionRegistry:
+    """One AssessmentSession per Streamlit session, evicted when idle or over the memory cap"""
+
+    def __init__(self, idle_seconds: float, max_bytes: int):
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        # session id -> (session, last used), least recently used first
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> AssessmentSession:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            session = entry[0] if entry else AssessmentSession()
+            self._sessions[session_id] = (session, now)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return session
+
+    def _evict(self, now: float):
+        for session_id, (_, used) in list(self._sessions.items()):
+            if used >= now - self.idle_seconds:
+                break
+            del self._sessions[session_id]
+        total = sum(session.size_bytes() for session, _ in self._sessions.values())
+        # The session just requested is the most recent, so it is never evicted here
+        while total > self.max_bytes and len(self._sessions) > 1:
+            _, (session, _) = self._sessions.popitem(last=False)
+            total -= session.size_bytes()
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+registry = SessionRegistry(Config.ASSESSMENT_SESSION_IDLE_SECONDS, Config.ASSESSMENT_SESSIONS_MAX_BYTES)
+
+
+def session_from(tool_context) -> AssessmentSession:
+    """Assessment session of the calling agent, from the session id in its state"""
+    session_id: Optional[str] = None
+    if tool_context is not None:
+        session_id = tool_context.agent.state.get("session_id")
+    return registry.get(session_id or DEFAULT_SESSION)
@@ -1,10 +1,8 @@
-from strands import tool
-from models.assessment_session import AssessmentSession
+from strands import tool, ToolContext
+from models.session_registry import session_from
 
-session = AssessmentSession()
-
-@tool
-def track_action(user_action: str, necessary_action: str = "", is_red_flag: bool = False) -> str:
+@tool(context=True)
+def track_action(user_action: str, necessary_action: str = "", is_red_flag: bool = False, tool_context: ToolContext = None) -> str:
     """
     Track an action performed by the candidate during the assessment.
     
@@ -12,6 +10,8 @@ def track_action(user_action: str, necessary_action: str = "", is_red_flag: bool
     necessary_action: The EXACT necessary action name from the list (e.g., "Check vital signs") if this matches a required action
     is_red_flag: Whether this action is a red flag (incorrect/dangerous)
     """
+    # The candidate's own session, from the session id in the calling agent's state
+    session = session_from(tool_context)
     session.add_completed_action(user_action)
     
     if is_red_flag:
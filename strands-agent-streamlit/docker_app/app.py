@@ -4,9 +4,10 @@ import boto3
 
 from agents.agent_config import system_prompt
 from strands import Agent
-from strands.models import BedrockModel
 from tools.suggest_travel_destination import suggest_travel_destination, session as suggest_session
 from tools.pick_travel_destination import pick_travel_destination, session as pick_session
+from instrumentation import Instrumentation
+from bedrock_client import bedrock_model
 
 from time import sleep
 
@@ -116,8 +117,8 @@ with col4:
     if st.button("🛍️ Luxury Shopping", use_container_width=True):
         st.session_state.selected_prompt = "Where should we travel for luxury shopping?"
 
-# Define LLM
-model = BedrockModel(
+# Define LLM (built once per model id, on the process-wide pooled Bedrock client)
+model = bedrock_model(
     model_id=selected_model,
     max_tokens=8192,
 )
@@ -131,6 +132,7 @@ for participant in st.session_state.participants:
         model=model,
         system_prompt=participant_prompt,
         tools=[suggest_travel_destination, pick_travel_destination],
+        hooks=[Instrumentation()],
     )
     agents.append(agent)
 
@@ -0,0 +1,120 @@
+# One bedrock-runtime client per process, shared by every BedrockModel the
+# app builds, so Streamlit reruns and sessions reuse its connection pool (and
+# TLS connections through the NAT gateway) instead of opening their own.
+# boto3 clients are thread-safe but sessions are not, so everything built
+# from the shared session is built under a lock.
+# Each call is counted, and whether it needed a new connection is written
+# as an EMF line next to the instrumentation spans.
+#
+# This file is shared: keep it identical in every docker_app.
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict
+
+import boto3
+from botocore.config import Config as BotocoreConfig
+from strands.models import BedrockModel
+
+from instrumentation import EMIT_EMF, NAMESPACE, SERVICE
+
+MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", 50))
+MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", 5))
+CONNECT_TIMEOUT = int(os.environ.get("BEDROCK_CONNECT_TIMEOUT", 10))
+READ_TIMEOUT = int(os.environ.get("BEDROCK_READ_TIMEOUT", 120))
+
+CLIENT_CONFIG = BotocoreConfig(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    tcp_keepalive=True,
+    # Adaptive mode also rate-limits the whole process when Bedrock throttles
+    retries={"total_max_attempts": MAX_ATTEMPTS, "mode": "adaptive"},
+    connect_timeout=CONNECT_TIMEOUT,
+    read_timeout=READ_TIMEOUT,
+    user_agent_extra="strands-agents",
+)
+
+_lock = threading.Lock()
+_session_lock = threading.RLock()
+_session = None
+_client = None
+_models: Dict[str, BedrockModel] = {}
+_stats = {"requests": 0, "newConnections": 0, "retries": 0}
+
+
+def _pool_connections(client) -> int:
+    """Connections opened so far by the client's urllib3 pools"""
+    manager = getattr(getattr(client._endpoint, "http_session", None), "_manager", None)
+    if manager is None:
+        return 0
+    return sum(manager.pools[key].num_connections for key in manager.pools.keys())
+
+
+def _after_call(parsed=None, **kwargs):
+    retries = ((parsed or {}).get("ResponseMetadata") or {}).get("RetryAttempts", 0)
+    with _lock:
+        opened = max(0, _pool_connections(_client) - _stats["newConnections"])
+        _stats["requests"] += 1
+        _stats["newConnections"] += opened
+        _stats["retries"] += retries
+    if EMIT_EMF:
+        sys.stdout.write(json.dumps({
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [["Service"]],
+                    "Metrics": [{"Name": "BedrockRequests", "Unit": "Count"},
+                                {"Name": "BedrockNewConnections", "Unit": "Count"},
+                                {"Name": "BedrockRetries", "Unit": "Count"}],
+                }],
+            },
+            "Service": SERVICE,
+            "BedrockRequests": 1,
+            "BedrockNewConnections": opened,
+            "BedrockRetries": retries,
+        }) + "\n")
+        sys.stdout.flush()
+
+
+def boto_session() -> boto3.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = boto3.Session()
+        return _session
+
+
+def bedrock_client():
+    """The process-wide bedrock-runtime client"""
+    global _client
+    with _session_lock:
+        if _client is None:
+            session = boto_session()
+            region = session.region_name or os.environ.get("AWS_REGION") or "us-west-2"
+            _client = session.client("bedrock-runtime", region_name=region, config=CLIENT_CONFIG)
+            _client.meta.events.register("after-call.bedrock-runtime.*", _after_call)
+        return _client
+
+
+def bedrock_model(**model_config: Any) -> BedrockModel:
+    """A BedrockModel that sends its requests through the shared client, built once per configuration"""
+    key = json.dumps(model_config, sort_keys=True, default=str)
+    with _session_lock:
+        model = _models.get(key)
+        if model is None:
+            # BedrockModel builds a client of its own; it is replaced before any request
+            model = BedrockModel(boto_session=boto_session(), boto_client_config=CLIENT_CONFIG, **model_config)
+            model.client = bedrock_client()
+            _models[key] = model
+        return model
+
+
+def connection_stats() -> Dict[str, Any]:
+    """Requests sent, connections opened and how often a pooled connection was reused"""
+    with _lock:
+        stats = dict(_stats)
+    stats["reuseRatio"] = round(1 - stats["newConnections"] / stats["requests"], 3) if stats["requests"] else None
+    stats["maxPoolConnections"] = MAX_POOL_CONNECTIONS
+    return stats